@@ -0,0 +1,73 @@
+"""Відтворювані вхідні дані для бенчмарків: синтетичне відео з рухомими фігурами та записані детекції."""
+import json
+
+import cv2
+import numpy as np
+
+from utils.helper import DETECTION_DTYPE
+
+
+class MovingShapes:
+    """Синтетичне відео: прямокутники, що рухаються з відбиттям від країв, на шумному фоні.
+
+    Кадри й рамки повністю визначаються seed, тож прогони порівнювані між машинами.
+    """
+
+    def __init__(self, num_objects=10, frame_size=(1280, 720), seed=0, num_classes=3):
+        self.width, self.height = frame_size
+        rng = np.random.default_rng(seed)
+        self.sizes = rng.integers(30, 120, size=(num_objects, 2)).astype(np.float32)
+        self.positions = rng.uniform((0, 0), (self.width, self.height), size=(num_objects, 2)).astype(np.float32)
+        self.positions = np.minimum(self.positions, (self.width, self.height) - self.sizes)
+        self.velocities = rng.uniform(-8, 8, size=(num_objects, 2)).astype(np.float32)
+        self.class_ids = rng.integers(0, num_classes, size=num_objects).astype(np.int32)
+        self.colors = rng.integers(40, 255, size=(num_objects, 3)).tolist()
+        self.background = rng.integers(0, 60, size=(self.height, self.width, 3), dtype=np.uint8)
+
+    def step(self):
+        """Наступний кадр та рамки об'єктів у ньому (масив DETECTION_DTYPE)."""
+        self.positions += self.velocities
+        limits = np.array((self.width, self.height), dtype=np.float32) - self.sizes
+        bounced = (self.positions < 0) | (self.positions > limits)
+        self.velocities[bounced] *= -1
+        np.clip(self.positions, 0, limits, out=self.positions)
+
+        frame = self.background.copy()
+        detections = np.empty(len(self.positions), dtype=DETECTION_DTYPE)
+        for index, ((x, y), (w, h)) in enumerate(zip(self.positions.astype(int), self.sizes.astype(int))):
+            cv2.rectangle(frame, (x, y), (x + w, y + h), self.colors[index], -1)
+            detections[index] = ((x, y, w, h), 0.9, self.class_ids[index])
+        return frame, detections
+
+    def frames(self, count):
+        for _ in range(count):
+            yield self.step()
+
+
+def load_clip(path, fixture_path, max_frames=None):
+    """Кадри записаного відео разом зі збереженими для нього детекціями (save_detections)."""
+    with open(fixture_path, encoding="utf-8") as f:
+        recorded = json.load(f)
+
+    video_cap = cv2.VideoCapture(path)
+    if not video_cap.isOpened():
+        raise RuntimeError(f"Error: Cannot open video source {path}")
+    try:
+        for frame_detections in recorded[:max_frames]:
+            ret, frame = video_cap.read()
+            if not ret:
+                break
+            detections = np.array([(tuple(ltwh), confidence, class_id)
+                                   for *ltwh, confidence, class_id in frame_detections], dtype=DETECTION_DTYPE)
+            yield frame, detections
+    finally:
+        video_cap.release()
+
+
+def save_detections(path, detections):
+    """Збереження детекцій по кадрах: [[l, t, w, h, confidence, class_id], ...] для кожного кадру."""
+    recorded = [[[*map(int, ltwh), round(float(confidence), 4), int(class_id)]
+                 for ltwh, confidence, class_id in frame_detections.tolist()]
+                for frame_detections in detections]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(recorded, f)
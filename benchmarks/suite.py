@@ -0,0 +1,307 @@
+"""Набір бенчмарків: мікробенчмарки етапів і наскрізний прогін із заглушкою детектора.
+
+Працює офлайн на CPU і не потребує ваг моделі (рамки беруться із синтетичного відео або записаної фікстури):
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --threshold 0.2
+    python -m benchmarks.suite --record-fixture clip.mp4 --fixture clip.json   # один раз, з моделлю YOLO
+    python -m benchmarks.suite --clip clip.mp4 --fixture clip.json
+
+Базова лінія (benchmarks/baseline.json) — це файл результатів попереднього прогону; необов'язковий ключ "thresholds"
+задає допустиме сповільнення для окремих бенчмарків (шаблони fnmatch), наприклад {"e2e_*": 0.3}.
+"""
+import argparse
+import fnmatch
+import json
+import platform
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.fixtures import MovingShapes, load_clip, save_detections
+from modules.metrics import metrics, percentile
+from utils.helper import letterbox, unletterbox_boxes, build_class_mask, boxes_to_detections, nms_detections
+from utils.config import classes, detection_params
+
+
+def measure(function, runs, warmup=3):
+    """Запуск function runs разів після прогріву. Повертає статистику часу виконання, мс."""
+    for _ in range(warmup):
+        function()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return summarize(timings)
+
+
+def summarize(timings):
+    return {'runs': len(timings),
+            'mean_ms': sum(timings) / len(timings) if timings else 0.0,
+            'min_ms': min(timings, default=0.0),
+            'p50_ms': percentile(timings, 50),
+            'p95_ms': percentile(timings, 95)}
+
+
+def filter_image(frame):
+    """Попередня фільтрація до FilterChain (еталон для порівняння): розмиття та нормалізація з новими копіями кадру."""
+    frame = cv2.GaussianBlur(frame, (5, 5), 0)
+    frame = cv2.normalize(frame, None, alpha=0, beta=255, norm_type=cv2.NORM_MINMAX)
+    return frame
+
+
+def bench_preprocess(frame, runs):
+    """Letterbox у вхід моделі та фільтри зображення на повному кадрі."""
+    from modules.preprocessing import FilterChain
+
+    buffer = np.empty((640, 640, 3), dtype=np.uint8)
+    results = {'preprocess_letterbox': measure(lambda: letterbox(frame, buffer), runs),
+               'preprocess_filter_image_legacy': measure(lambda: filter_image(frame), runs)}
+    for filters in (['blur', 'normalize'], ['clahe']):
+        chain = FilterChain({'filters': filters, 'at_model_resolution': False})
+        work = frame.copy()
+        results[f"preprocess_filters_{'_'.join(filters)}"] = measure(lambda: chain.apply(work), runs)
+    return results
+
+
+def bench_postprocess(frame_shape, box_counts, runs, seed=0):
+    """Перетворення синтетичного виходу YOLO (N, 6) у детекції кадру та NMS."""
+    rng = np.random.default_rng(seed)
+    class_mask = build_class_mask(dict(enumerate(classes)), classes)
+    scale = 640 / max(frame_shape[:2])
+    results = {}
+    for count in box_counts:
+        corners = np.sort(rng.uniform(0, 640, size=(count, 2, 2)), axis=1).reshape(count, 4)
+        raw = np.column_stack((corners, rng.uniform(0.3, 1.0, count), rng.integers(0, len(classes), count)))
+        raw = raw.astype(np.float32)
+
+        def postprocess():
+            boxes = unletterbox_boxes(raw, scale, 0, 0, frame_shape)
+            return boxes_to_detections(boxes, 0.5, class_mask)
+
+        detections = postprocess()
+        results[f"postprocess_{count}_boxes"] = measure(postprocess, runs)
+        results[f"nms_{count}_boxes"] = measure(lambda: nms_detections(detections, 0.5), runs)
+    return results
+
+
+def bench_tracker(backends, track_counts, frames, frame_size):
+    """Оновлення трекера з K рухомими об'єктами (час одного кадру)."""
+    from modules.trackers import create_tracker
+
+    results = {}
+    for count in track_counts:
+        sequence = list(MovingShapes(count, frame_size).frames(frames))
+        for backend in backends:
+            tracker = create_tracker(backend)
+            timings = []
+            for frame, detections in sequence:
+                start = time.perf_counter()
+                tracker.update(detections, frame)
+                timings.append((time.perf_counter() - start) * 1000)
+            results[f"tracker_{backend}_{count}_tracks"] = summarize(timings[5:])
+    return results
+
+
+def bench_draw_and_log(track_counts, frames, frame_size, runs):
+    """Малювання треків із траєкторіями та постановка записів у чергу журналу."""
+    from modules.logger import Logger
+    from modules.object_tracking import ObjectTracking
+
+    names = dict(enumerate(classes))
+    results = {}
+    for count in track_counts:
+        tracking = ObjectTracking(backend='sort')
+        tracks = []
+        for frame, detections in MovingShapes(count, frame_size, num_classes=1).frames(frames):
+            tracks = tracking.update_tracks(detections, frame)
+        canvas = frame.copy()
+        results[f"draw_tracks_{count}_tracks"] = measure(lambda: tracking._draw_tracks(canvas, tracks), runs)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            logger = Logger(output_dir, {'mode': 'frames', 'max_queue': runs * count * 2 + 1000})
+            results[f"logger_{count}_tracks"] = measure(lambda: logger.log_tracks(tracks, names, 0), runs)
+            logger.close()
+
+            # Запис одного пакета напряму (секунда при 30 кадрах/с): close() лише чекав би на flush_interval
+            now = time.time()
+            batch = [logger._track_record("frame", track, names, index, now)
+                     for index in range(30) for track in tracks]
+            logger._open()
+            results[f"logger_flush_{count}_tracks"] = measure(lambda: logger._write_batch(batch), runs)
+            logger._file.close()
+    return results
+
+
+class StubModel:
+    """Заглушка моделі YOLO: лише назви класів."""
+    names = dict(enumerate(classes))
+
+
+def make_stub_detector(backend):
+    """ObjectDetectionAndTracking без ваг: фільтри, передобробка, трекінг і оверлеї справжні, рамки — з фікстури."""
+    from modules.object_detection import ObjectDetectionAndTracking
+    from modules.object_tracking import ObjectTracking
+
+    class StubDetector(ObjectDetectionAndTracking):
+        current_detections = None
+
+        def detect(self, frames):
+            # Лише letterbox і фільтри: перетворення в тензор — частина інференсу, якого тут немає
+            with metrics.timer("preprocess"):
+                self._letterbox_batch(frames)
+            return [self.current_detections for _ in frames]
+
+    from modules.cadence import DetectionCadence
+
+    detector = StubDetector(None, 0.5, classes, tracker=ObjectTracking(backend), model=StubModel())
+    # Адаптивна частота детекції залежить від часу виконання — для відтворюваності детекція на кожному кадрі
+    detector.cadence = DetectionCadence({'enabled': False})
+    return detector
+
+
+def bench_end_to_end(sequence, backend):
+    """Наскрізний прогін analyze_frame + annotate_frame. Повертає загальний час кадру та часи етапів."""
+    detector = make_stub_detector(backend)
+    metrics.reset()
+    timings = []
+    for frame, detections in sequence:
+        detector.current_detections = detections
+        start = time.perf_counter()
+        frame, tracks = detector.analyze_frame(frame)
+        detector.annotate_frame(frame, tracks)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    results = {f"e2e_{backend}_frame": summarize(timings[5:])}
+    total_s = sum(timings) / 1000
+    results[f"e2e_{backend}_frame"]['fps'] = len(timings) / total_s if total_s else 0.0
+    for stage, summary in metrics.snapshot()['stages'].items():
+        results[f"e2e_{backend}_stage_{stage}"] = {'runs': summary['count'], 'mean_ms': summary['mean_ms'],
+                                                   'p50_ms': summary['p50_ms'], 'p95_ms': summary['p95_ms']}
+    return results
+
+
+def record_fixture(clip, fixture, model_path, confidence_threshold, max_frames):
+    """Запис детекцій справжньої моделі для відео, щоб наступні прогони не потребували ваг."""
+    from modules.object_detection import ObjectDetectionAndTracking
+
+    detector = ObjectDetectionAndTracking(model_path, confidence_threshold, classes)
+    video_cap = cv2.VideoCapture(clip)
+    detections = []
+    while max_frames is None or len(detections) < max_frames:
+        ret, frame = video_cap.read()
+        if not ret:
+            break
+        detections.append(detector.detect([frame])[0])
+    video_cap.release()
+    save_detections(fixture, detections)
+    print(f"Saved detections for {len(detections)} frames to {fixture}")
+
+
+def compare(results, baseline, threshold):
+    """Порівняння p50 з базовою лінією. Повертає список регресій."""
+    thresholds = baseline.get('thresholds', {})
+    regressions = []
+    print(f"{'benchmark':<48} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, summary in results.items():
+        base = baseline['results'].get(name)
+        if base is None or not base['p50_ms']:
+            continue
+        limit = next((value for pattern, value in thresholds.items() if fnmatch.fnmatch(name, pattern)), threshold)
+        change = summary['p50_ms'] / base['p50_ms'] - 1
+        regressed = change > limit
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<48} {base['p50_ms']:>8.3f}ms {summary['p50_ms']:>8.3f}ms {change:>+7.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def parse_size(value):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline CPU benchmarks for the detection and tracking pipeline.")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against this results file; exit code 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p50 slowdown (0.2 = 20%%)")
+    parser.add_argument("--runs", type=int, default=50, help="Repetitions of each micro-benchmark")
+    parser.add_argument("--frames", type=int, default=200, help="Frames for tracker and end-to-end runs")
+    parser.add_argument("--frame-size", type=parse_size, default=(1280, 720), help="Synthetic frame size, WxH")
+    parser.add_argument("--boxes", type=int, nargs="+", default=[10, 100, 1000], help="Boxes for post-processing")
+    parser.add_argument("--tracks", type=int, nargs="+", default=[10, 50], help="Objects for tracker runs")
+    parser.add_argument("--trackers", nargs="+", default=['sort', 'bytetrack'], help="Tracker backends")
+    parser.add_argument("--threads", type=int, default=1, help="OpenCV/torch threads (fixed for reproducibility)")
+    parser.add_argument("--clip", help="Recorded video for the end-to-end run (requires --fixture)")
+    parser.add_argument("--fixture", help="Detections recorded for --clip")
+    parser.add_argument("--record-fixture", metavar="CLIP", help="Record detections for CLIP into --fixture and exit")
+    parser.add_argument("--model", default=detection_params[0])
+    parser.add_argument("--conf", type=float, default=detection_params[1])
+    parser.add_argument("--skip-e2e", action="store_true", help="Only run micro-benchmarks")
+    args = parser.parse_args(argv)
+
+    if args.record_fixture:
+        if not args.fixture:
+            parser.error("--record-fixture requires --fixture")
+        record_fixture(args.record_fixture, args.fixture, args.model, args.conf, args.frames)
+        return 0
+    if args.clip and not args.fixture:
+        parser.error("--clip requires --fixture")
+
+    cv2.setNumThreads(args.threads)
+    frame, _ = MovingShapes(frame_size=args.frame_size).step()
+
+    results = {}
+    results.update(bench_preprocess(frame, args.runs))
+    results.update(bench_postprocess(frame.shape, args.boxes, args.runs))
+    results.update(bench_tracker(args.trackers, args.tracks, args.frames, args.frame_size))
+    results.update(bench_draw_and_log(args.tracks, args.frames, args.frame_size, args.runs))
+    if not args.skip_e2e:
+        try:
+            import torch
+
+            torch.set_num_threads(args.threads)
+        except ImportError:
+            pass  # Заглушці моделі torch не потрібен
+        for backend in args.trackers:
+            if args.clip:
+                sequence = load_clip(args.clip, args.fixture, args.frames)
+            else:
+                sequence = MovingShapes(max(args.tracks), args.frame_size).frames(args.frames)
+            results.update(bench_end_to_end(sequence, backend))
+
+    report = {'meta': {'timestamp': time.time(),
+                       'python': platform.python_version(),
+                       'platform': platform.platform(),
+                       'processor': platform.processor(),
+                       'numpy': np.__version__,
+                       'opencv': cv2.__version__,
+                       'threads': args.threads,
+                       'frame_size': list(args.frame_size),
+                       'source': args.clip or "synthetic"},
+              'results': results}
+
+    for name, summary in results.items():
+        print(f"{name:<48} p50: {summary['p50_ms']:9.3f} ms  p95: {summary['p95_ms']:9.3f} ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over threshold: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
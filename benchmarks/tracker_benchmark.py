@@ -0,0 +1,96 @@
+"""Порівняння трекерів на одному відео: стабільність ідентифікаторів проти кадрів/с.
+
+Детекції обчислюються один раз і повторно подаються в кожен трекер, тож вимірюється лише трекінг.
+
+    python -m benchmarks.tracker_benchmark --source clip.mp4 --frames 300
+"""
+import argparse
+import collections
+import json
+import time
+
+import cv2
+
+from modules.trackers import create_tracker
+from utils.config import detection_params, classes
+
+# Назва варіанта -> (трекер, параметри)
+VARIANTS = {
+    'deepsort': ('deepsort', {'refresh_interval': 1}),
+    'deepsort_k5': ('deepsort', {'refresh_interval': 5}),
+    'deepsort_cached': ('deepsort', {'refresh_interval': 0}),
+    'sort': ('sort', None),
+    'bytetrack': ('bytetrack', None),
+}
+
+
+def read_frames(source, max_frames):
+    video_cap = cv2.VideoCapture(source)
+    if not video_cap.isOpened():
+        raise RuntimeError(f"Error: Cannot open video source {source}")
+    try:
+        index = 0
+        while max_frames is None or index < max_frames:
+            ret, frame = video_cap.read()
+            if not ret:
+                break
+            yield frame
+            index += 1
+    finally:
+        video_cap.release()
+
+
+def collect_detections(source, max_frames, model_path, confidence_threshold):
+    from modules.object_detection import ObjectDetectionAndTracking
+
+    detector = ObjectDetectionAndTracking(model_path, confidence_threshold, classes)
+    return [detector.detect([frame])[0] for frame in read_frames(source, max_frames)]
+
+
+def run_variant(variant, source, detections):
+    """Прогін трекера по кешованих детекціях. Повертає FPS трекінгу та метрики стабільності ID."""
+    tracker = create_tracker(*VARIANTS[variant])
+    lifetimes = collections.Counter()
+    elapsed = 0.0
+    for frame, frame_detections in zip(read_frames(source, len(detections)), detections):
+        start = time.perf_counter()
+        tracks = tracker.update(frame_detections, frame)
+        elapsed += time.perf_counter() - start
+        for track in tracks:
+            if track.is_confirmed() and track.time_since_update == 0:
+                lifetimes[track.track_id] += 1
+
+    frames = len(detections)
+    ids = len(lifetimes)
+    return {'variant': variant,
+            'frames': frames,
+            'tracking_fps': frames / elapsed if elapsed else 0.0,
+            'unique_ids': ids,
+            'ids_per_100_frames': 100 * ids / frames if frames else 0.0,
+            'mean_track_length': sum(lifetimes.values()) / ids if ids else 0.0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare tracker backends on the same clip.")
+    parser.add_argument("--source", required=True, help="Video file")
+    parser.add_argument("--frames", type=int, default=300, help="Number of frames to process")
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS), choices=list(VARIANTS))
+    parser.add_argument("--model", default=detection_params[0])
+    parser.add_argument("--conf", type=float, default=detection_params[1])
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    detections = collect_detections(args.source, args.frames, args.model, args.conf)
+    results = [run_variant(variant, args.source, detections) for variant in args.variants]
+
+    print(f"{'variant':<18} {'track FPS':>10} {'IDs':>6} {'IDs/100f':>9} {'mean len':>9}")
+    for result in results:
+        print(f"{result['variant']:<18} {result['tracking_fps']:>10.1f} {result['unique_ids']:>6} "
+              f"{result['ids_per_100_frames']:>9.2f} {result['mean_track_length']:>9.1f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
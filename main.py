@@ -1,16 +1,20 @@
 import os
 import sys
-from PyQt5.QtWidgets import QApplication
 
-from modules.logger import Logger
-from modules.object_tracking import ObjectTracking
-from modules.video_recorder import VideoRecorder
-from modules.object_detection import ObjectDetectionAndTracking
-from modules.object_detection_gui import ObjectDetectionGUI  # Імпортуємо GUI із окремого файлу
-from utils.config import detection_params, video_source, classes
+from utils.config import detection_params, video_source, classes, stream_server_params
 
 
 def main():
+    # Важкі залежності (torch, ultralytics, deep_sort_realtime, PyQt5) імпортуються лише під час запуску
+    from PyQt5.QtWidgets import QApplication
+
+    from modules.logger import Logger
+    from modules.metrics import start_exporters
+    from modules.object_tracking import ObjectTracking
+    from modules.video_recorder import VideoRecorder
+    from modules.object_detection import ObjectDetectionAndTracking
+    from modules.object_detection_gui import ObjectDetectionGUI  # Імпортуємо GUI із окремого файлу
+
     try:
         output_dir = os.path.expanduser("data")
         logger = Logger(output_dir)
@@ -21,13 +25,29 @@ def main():
             *detection_params, classes, logger, tracker, video_recorder, output_dir
         )
 
+        # Експорт метрик продуктивності (якщо увімкнено в конфігурації)
+        start_exporters()
+
+        # Трансляція для віддаленого перегляду (якщо увімкнено в конфігурації)
+        stream_server = None
+        if stream_server_params['enabled']:
+            from modules.stream_server import StreamServer
+            stream_server = StreamServer().start()
+            detection_app.stream_server = stream_server
+
         # Ініціалізація PyQt застосунку
         qt_app = QApplication(sys.argv)
         gui = ObjectDetectionGUI(detection_app)
 
         # Запуск GUI
         gui.show()
-        sys.exit(qt_app.exec_())
+        exit_code = qt_app.exec_()
+
+        # Дописування журналу на диск
+        if stream_server is not None:
+            stream_server.stop()
+        logger.close()
+        sys.exit(exit_code)
 
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,64 @@
+import math
+
+from utils.config import cadence_params
+
+
+class DetectionCadence:
+    """Адаптивна частота детекції: YOLO кожен N-й кадр, між ними — лише прогноз трекера.
+
+    N підбирається автоматично, щоб середній час кадру вкладався у бюджет target_fps.
+    """
+
+    def __init__(self, params=None, smoothing=0.9):
+        params = {**cadence_params, **(params or {})}
+        self.enabled = params['enabled']
+        self.min_interval = max(1, params['min_interval'])
+        self.max_interval = max(self.min_interval, params['max_interval'])
+        self.target_fps = params['target_fps']
+        self.smoothing = smoothing
+
+        self.interval = self.min_interval
+        self.frames_since_detection = self.interval  # Перший кадр завжди з детекцією
+        self.detection_frames = 0
+        self.predict_frames = 0
+        self.detection_ms = 0.0
+        self.predict_ms = 0.0
+
+    def should_detect(self):
+        return not self.enabled or self.frames_since_detection >= self.interval
+
+    def record(self, detected, elapsed_ms):
+        """Облік виконаного кадру та перерахунок інтервалу."""
+        if detected:
+            self.detection_frames += 1
+            self.frames_since_detection = 1
+            self.detection_ms = self._smooth(self.detection_ms, elapsed_ms, self.detection_frames)
+        else:
+            self.predict_frames += 1
+            self.frames_since_detection += 1
+            self.predict_ms = self._smooth(self.predict_ms, elapsed_ms, self.predict_frames)
+        if self.enabled:
+            self.interval = self._compute_interval()
+
+    def _smooth(self, previous, value, count):
+        return value if count == 1 else self.smoothing * previous + (1 - self.smoothing) * value
+
+    def _compute_interval(self):
+        # Середній час кадру: (det + (N - 1) * pred) / N <= budget  =>  N >= (det - pred) / (budget - pred)
+        budget_ms = 1000.0 / self.target_fps
+        if self.detection_ms <= budget_ms:
+            return self.min_interval
+        if self.predict_ms >= budget_ms:
+            return self.max_interval
+        interval = math.ceil((self.detection_ms - self.predict_ms) / (budget_ms - self.predict_ms))
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def stats(self):
+        """Метрики: кількість кадрів з детекцією та лише з прогнозом, поточний інтервал і середні часи."""
+        total = self.detection_frames + self.predict_frames
+        return {'interval': self.interval,
+                'detection_frames': self.detection_frames,
+                'predict_frames': self.predict_frames,
+                'detection_ratio': self.detection_frames / total if total else 0.0,
+                'detection_ms': self.detection_ms,
+                'predict_ms': self.predict_ms}
@@ -0,0 +1,184 @@
+import threading
+import time
+
+import cv2
+
+from modules.metrics import metrics, FpsMeter, LatencyWindow
+from modules.pipeline import FrameQueue
+from utils.helper import is_live_source
+from utils.config import capture_params
+
+CAPTURE_BACKENDS = {
+    'any': cv2.CAP_ANY,
+    'ffmpeg': cv2.CAP_FFMPEG,
+    'gstreamer': cv2.CAP_GSTREAMER,
+    'v4l2': cv2.CAP_V4L2,
+    'dshow': cv2.CAP_DSHOW,
+    'msmf': cv2.CAP_MSMF,
+}
+
+
+class AsyncCapture:
+    """Захоплення кадрів у власному потоці.
+
+    Живі джерела тримають лише найсвіжіший кадр і перепідключаються з експоненційною затримкою,
+    файли читаються послідовно без втрат. Елементи черги — (час захоплення, кадр).
+    """
+
+    def __init__(self, source, params=None, on_frame=None):
+        self.params = {**capture_params, **(params or {})}
+        if self.params['backend'] not in CAPTURE_BACKENDS:
+            raise ValueError(f"Unknown capture backend: {self.params['backend']}")
+
+        self.source = source
+        self.live = is_live_source(source)
+        self.on_frame = on_frame
+        self.video_cap = self._open()
+        if not self.video_cap.isOpened():
+            raise RuntimeError(f"Error: Cannot open video source {source}")
+        self.source_fps = self.video_cap.get(cv2.CAP_PROP_FPS) or 0.0
+
+        self.queue = FrameQueue(1 if self.live else self.params['queue_size'], "latest" if self.live else "lossless")
+        self.stop_event = threading.Event()
+        self.finished = False
+        self.thread = None
+        self._frame_event = threading.Event()
+
+        self.fps_meter = FpsMeter()
+        self.decode = LatencyWindow()
+        self.grabbed = 0
+        self.reconnects = 0
+
+    @property
+    def fps(self):
+        """FPS джерела з урахуванням frame_step (0, якщо невідомий)."""
+        return self.source_fps / max(1, self.params['frame_step'])
+
+    @property
+    def frame_size(self):
+        """Розмір кадрів джерела (ширина, висота)."""
+        return (int(self.video_cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.video_cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    def start(self):
+        self.thread = threading.Thread(target=self._loop, name=f"capture-{self.source}", daemon=True)
+        self.thread.start()
+        return self
+
+    def read(self):
+        """Наступний кадр: (True, кадр) або (False, None) після завершення джерела чи зупинки."""
+        with metrics.timer("capture"):
+            while not self.stop_event.is_set():
+                self._frame_event.clear()
+                finished = self.finished
+                item = self.queue.get_nowait()
+                if item is not None:
+                    return True, item[1]
+                if finished:
+                    break
+                self._frame_event.wait(0.1)
+            return False, None
+
+    def is_exhausted(self):
+        return self.finished and self.queue.qsize() == 0
+
+    def release(self, timeout=2.0):
+        self.stop_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+        if self.thread is None or not self.thread.is_alive():
+            self.video_cap.release()
+
+    def stats(self):
+        """Статистика захоплення: кадри, FPS, час декодування, відкинуті й пропущені кадри, перепідключення."""
+        return {'source': self.source,
+                'live': self.live,
+                'frames': self.fps_meter.frames,
+                'fps': self.fps_meter.fps,
+                'decode': self.decode.summary(),
+                'dropped': self.queue.dropped,
+                'grabbed': self.grabbed,
+                'reconnects': self.reconnects}
+
+    def _loop(self):
+        try:
+            while not self.stop_event.is_set():
+                self._skip_frames()
+                start = time.perf_counter()
+                ret, frame = self.video_cap.read()
+                if not ret:
+                    # Кінець файлу або обрив живого потоку
+                    if not self.live or not self._reconnect():
+                        break
+                    continue
+
+                decode_ms = (time.perf_counter() - start) * 1000
+                self.decode.observe(decode_ms)
+                metrics.observe("decode", decode_ms)
+                self.fps_meter.tick()
+                if self.queue.put((time.monotonic(), frame), self.stop_event):
+                    self._notify()
+        except Exception as e:
+            print(f"Capture error ({self.source}): {e}")
+        finally:
+            self.finished = True
+            self._notify()
+            self.video_cap.release()
+
+    def _notify(self):
+        self._frame_event.set()
+        if self.on_frame is not None:
+            self.on_frame()
+
+    def _skip_frames(self):
+        """Пропуск frame_step - 1 кадрів без retrieve() (без перетворення в BGR)."""
+        for _ in range(self.params['frame_step'] - 1):
+            if not self.video_cap.grab():
+                return
+            self.grabbed += 1
+            metrics.increment("capture_grabbed_frames")
+
+    def _reconnect(self):
+        """Повторне відкриття живого джерела з експоненційною затримкою. False — спроби вичерпано або зупинка."""
+        self.video_cap.release()
+        delay = self.params['reconnect_delay']
+        attempts = 0
+        while not self.stop_event.is_set():
+            if self.params['max_reconnects'] is not None and attempts >= self.params['max_reconnects']:
+                print(f"Capture: giving up on {self.source} after {attempts} reconnect attempts")
+                return False
+            attempts += 1
+            if self.stop_event.wait(delay):
+                return False
+            self.video_cap = self._open()
+            if self.video_cap.isOpened():
+                self.reconnects += 1
+                metrics.increment("capture_reconnects")
+                print(f"Capture: reconnected to {self.source}")
+                return True
+            self.video_cap.release()
+            delay = min(delay * 2, self.params['max_reconnect_delay'])
+        return False
+
+    def _open(self):
+        backend = CAPTURE_BACKENDS[self.params['backend']]
+        options = []
+        if self.params['hw_acceleration'] and hasattr(cv2, "CAP_PROP_HW_ACCELERATION"):
+            options += [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        if self.live and self.params['open_timeout_ms'] and hasattr(cv2, "CAP_PROP_OPEN_TIMEOUT_MSEC"):
+            options += [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, self.params['open_timeout_ms'],
+                        cv2.CAP_PROP_READ_TIMEOUT_MSEC, self.params['open_timeout_ms']]
+        video_cap = cv2.VideoCapture(self.source, backend, options) if options else \
+            cv2.VideoCapture(self.source, backend)
+        if options and not video_cap.isOpened():
+            # Збірка або пристрій не підтримує запитані параметри
+            video_cap = cv2.VideoCapture(self.source, backend)
+
+        if video_cap.isOpened():
+            if self.live:
+                # Мінімальний внутрішній буфер OpenCV, щоб не обробляти застарілі кадри
+                video_cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            if self.params['frame_size']:
+                width, height = self.params['frame_size']
+                video_cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                video_cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        return video_cap
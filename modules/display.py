@@ -0,0 +1,71 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from modules.metrics import metrics
+
+
+class DisplayAdapter:
+    """Підготовка кадрів до показу в потоці рендерингу, а не в потоці GUI.
+
+    Кадр масштабується до поточного розміру віджета в попередньо виділений буфер; частота показу
+    обмежується max_fps (частотою монітора) незалежно від частоти обробки.
+    """
+
+    def __init__(self, bgr_supported=True, max_fps=None):
+        self.convert = not bgr_supported  # Без QImage.Format_BGR888 — перетворення в RGB у тому ж буфері
+        self.interval = 1.0 / max_fps if max_fps else 0.0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._target_size = None
+        self._buffer = None
+        self._pending = False
+        self._last_shown = 0.0
+
+    def set_target_size(self, width, height):
+        """Розмір області показу у фізичних пікселях (викликається з потоку GUI)."""
+        with self._lock:
+            self._target_size = (max(int(width), 1), max(int(height), 1))
+
+    def prepare(self, frame):
+        """Зображення для показу або None, якщо кадр пропускається (GUI ще не показав попередній чи зарано)."""
+        now = time.monotonic()
+        with self._lock:
+            if self._pending or now - self._last_shown < self.interval:
+                self.dropped += 1
+                metrics.increment("display_dropped_frames")
+                return None
+            target_size = self._target_size
+
+        with metrics.timer("display_prepare"):
+            image = self._scale(frame, target_size)
+        with self._lock:
+            self._pending = True
+            self._last_shown = now
+        return image
+
+    def release(self):
+        """Буфер вільний: GUI скопіював його у QPixmap."""
+        with self._lock:
+            self._pending = False
+
+    def _scale(self, frame, target_size):
+        height, width = frame.shape[:2]
+        scale = 1.0 if target_size is None else min(target_size[0] / width, target_size[1] / height)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+
+        if size == (width, height) and not self.convert:
+            return frame  # Ні масштабування, ні перетворення кольорів — кадр показується як є
+        if self._buffer is None or self._buffer.shape[1::-1] != size:
+            self._buffer = np.empty((size[1], size[0], 3), dtype=np.uint8)
+
+        if size == (width, height):
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._buffer)
+            return self._buffer
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+        cv2.resize(frame, size, dst=self._buffer, interpolation=interpolation)
+        if self.convert:
+            cv2.cvtColor(self._buffer, cv2.COLOR_BGR2RGB, dst=self._buffer)
+        return self._buffer
@@ -0,0 +1,146 @@
+import collections
+import threading
+
+import numpy as np
+
+from modules.metrics import metrics
+from utils.helper import iou_matrix
+from utils.config import embedding_params
+
+
+def _track_feature(track):
+    feature = getattr(track, "latest_feature", None)
+    if feature is None and track.features:
+        feature = track.features[-1]
+    return feature
+
+
+def _crop(frame, ltwh):
+    """Кроп рамки [l, t, w, h], обмеженої межами кадру (щонайменше 1x1 піксель)."""
+    height, width = frame.shape[:2]
+    left, top, box_width, box_height = ltwh
+    x_min = min(max(int(left), 0), width - 1)
+    y_min = min(max(int(top), 0), height - 1)
+    x_max = max(min(int(left + box_width), width), x_min + 1)
+    y_max = max(min(int(top + box_height), height), y_min + 1)
+    return frame[y_min:y_max, x_min:x_max]
+
+
+class EmbeddingCache:
+    """LRU-кеш ембедингів за track_id разом з рамкою детекції, для якої ембединг обчислено."""
+
+    def __init__(self, capacity=None, iou_threshold=None):
+        self.capacity = capacity or embedding_params['cache_size']
+        self.iou_threshold = iou_threshold if iou_threshold is not None else embedding_params['iou_threshold']
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, boxes):
+        """Ембединги для рамок ltrb, що майже не зрушили відносно кешованих; None — потрібне обчислення."""
+        embeds = [None] * len(boxes)
+        if self._entries and len(boxes):
+            track_ids = list(self._entries)
+            ious = iou_matrix(boxes, np.array([self._entries[track_id][0] for track_id in track_ids]))
+            best_entry = ious.argmax(axis=1)
+            best_iou = ious[np.arange(len(ious)), best_entry]
+            # Кожен запис кешу віддається не більше ніж одній детекції — тій, що перекривається найбільше
+            used = set()
+            for index in np.argsort(-best_iou):
+                entry = best_entry[index]
+                if best_iou[index] < self.iou_threshold:
+                    break
+                if entry in used:
+                    continue
+                used.add(entry)
+                track_id = track_ids[entry]
+                self._entries.move_to_end(track_id)
+                embeds[index] = self._entries[track_id][1]
+
+        hits = sum(embed is not None for embed in embeds)
+        self.hits += hits
+        self.misses += len(embeds) - hits
+        metrics.increment("embedding_cache_hits", hits)
+        metrics.increment("embedding_cache_misses", len(embeds) - hits)
+        return embeds
+
+    def update(self, tracks):
+        """Запис ембедингів треків, оновлених у цьому кадрі; видалення зниклих треків."""
+        for track in tracks:
+            if track.is_deleted():
+                self._entries.pop(track.track_id, None)
+                continue
+            feature = _track_feature(track)
+            if track.time_since_update > 0 or feature is None:
+                continue
+            box = track.to_ltrb(orig=True)
+            if box is None:
+                continue
+            self._entries[track.track_id] = (np.asarray(box, dtype=np.float32), feature)
+            self._entries.move_to_end(track.track_id)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0}
+
+
+class EmbeddingStage:
+    """Ембедер ре-ID: кропи всіх детекцій кадру (або пакета кадрів кількох потоків) — за один прохід."""
+
+    def __init__(self, params=None, embedder=None):
+        self.params = {**embedding_params, **(params or {})}
+        self.embedder = embedder or self._create_embedder()
+        self._lock = threading.Lock()
+
+    def _create_embedder(self):
+        import torch
+        from deep_sort_realtime.embedder.embedder_pytorch import MobileNetv2_Embedder
+
+        gpu = torch.cuda.is_available()
+        # FP16 на CPU не пришвидшує, тож вмикається лише на GPU
+        return MobileNetv2_Embedder(half=self.params['half'] and gpu, max_batch_size=self.params['batch_size'],
+                                    bgr=True, gpu=gpu)
+
+    def compute(self, requests):
+        """Обчислення ембедингів для запитів (кадр, детекції DeepSort, готові ембединги або None).
+
+        Готові ембединги (наприклад, з EmbeddingCache) зберігаються, решта обчислюється одним викликом ембедера.
+        Повертає список ембедингів для кожного запиту.
+        """
+        results, crops, slots = [], [], []
+        for request_index, (frame, raw_detections, embeds) in enumerate(requests):
+            embeds = list(embeds) if embeds is not None else [None] * len(raw_detections)
+            results.append(embeds)
+            for index, embed in enumerate(embeds):
+                if embed is None:
+                    crops.append(_crop(frame, raw_detections[index][0]))
+                    slots.append((request_index, index))
+
+        if crops:
+            with self._lock, metrics.timer("embed"):
+                features = self.embedder.predict(crops)
+            for (request_index, index), feature in zip(slots, features):
+                results[request_index][index] = feature
+        metrics.increment("embedding_crops", len(crops))
+        return results
+
+
+_shared_stage = None
+_shared_lock = threading.Lock()
+
+
+def get_embedding_stage():
+    """Спільний для процесу EmbeddingStage (одна модель ре-ID на всі трекери та потоки)."""
+    global _shared_stage
+    with _shared_lock:
+        if _shared_stage is None:
+            _shared_stage = EmbeddingStage()
+        return _shared_stage
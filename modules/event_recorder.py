@@ -0,0 +1,101 @@
+import collections
+import time
+
+import cv2
+
+from modules.video_writer import AsyncVideoWriter
+from utils.config import event_recording_params
+
+
+class EventRecorder:
+    """Запис за подією: кільцевий буфер стиснених кадрів (pre-roll) та запис до post_seconds після останньої цілі."""
+
+    def __init__(self, movies_dir, fps_source, params=None):
+        self.params = {**event_recording_params, **(params or {})}
+        self.movies_dir = movies_dir
+        self.fps_source = fps_source  # Функція, що повертає поточний FPS для запису
+        self.trigger_classes = set(self.params['trigger_classes'])
+        self.max_buffer_bytes = int(self.params['max_buffer_mb'] * 1024 * 1024)
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, self.params['jpeg_quality']]
+
+        self.buffer = collections.deque()  # (час, JPEG-байти)
+        self.buffer_bytes = 0
+        self.writer = None
+        self.last_trigger_time = None
+        self.events = 0
+        self.failed = False  # Файл запису не вдалося відкрити — запис за подією вимкнено
+
+    @property
+    def is_active(self):
+        return self.writer is not None
+
+    def update(self, frame, tracks, names, timestamp=None):
+        """Обробка анотованого кадру та треків поточного кадру."""
+        if self.failed:
+            return
+        now = time.time() if timestamp is None else timestamp
+        if self._is_triggered(tracks, names):
+            self.last_trigger_time = now
+            if self.writer is None:
+                self._start_event(frame.shape[1::-1])
+                if self.failed:
+                    return
+
+        if self.writer is not None:
+            self.writer.write(frame, now)
+            if self.writer.failed:
+                print("Event recording stopped: video writer failed")
+                self.failed = True
+                self.writer = None
+            elif now - self.last_trigger_time >= self.params['post_seconds']:
+                self._stop_event()
+        else:
+            # Поза подією кадри лише накопичуються у буфері попереднього запису
+            self._buffer_frame(frame, now)
+
+    def _is_triggered(self, tracks, names):
+        return any(track.is_confirmed() and names.get(track.det_class) in self.trigger_classes for track in tracks)
+
+    def _buffer_frame(self, frame, now):
+        """Додавання стисненого кадру з дотриманням ліміту тривалості та пам'яті."""
+        ok, encoded = cv2.imencode(".jpg", frame, self.encode_params)
+        if not ok:
+            return
+        data = encoded.tobytes()
+        self.buffer.append((now, data))
+        self.buffer_bytes += len(data)
+
+        while self.buffer and (self.buffer_bytes > self.max_buffer_bytes or
+                               now - self.buffer[0][0] > self.params['pre_seconds']):
+            _, old_data = self.buffer.popleft()
+            self.buffer_bytes -= len(old_data)
+
+    def _start_event(self, frame_size):
+        """Початок запису: відкриття файлу та скидання pre-roll у потік запису."""
+        try:
+            self.writer = AsyncVideoWriter(self.movies_dir, self.fps_source(), prefix="event").start(frame_size)
+        except IOError as e:
+            print(f"Event recording disabled: {e}")
+            self.failed = True
+            return
+        self.events += 1
+        self.writer.write_many(list(self.buffer))
+        self.buffer.clear()
+        self.buffer_bytes = 0
+
+    def _stop_event(self):
+        # Не блокуємо рендеринг: потік запису сам допише чергу та закриє файл
+        self.writer.close(wait=False)
+        self.writer = None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def stats(self):
+        return {'active': self.is_active,
+                'events': self.events,
+                'buffered_frames': len(self.buffer),
+                'buffer_bytes': self.buffer_bytes,
+                'writer': self.writer.stats() if self.writer is not None else None}
@@ -0,0 +1,247 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import time
+
+import cv2
+
+from modules.metrics import percentile
+from utils.helper import create_video_writer
+from utils.config import detection_params, classes
+
+STAGES = ("read", "analyze", "annotate", "write")
+
+# Детектор процесу-обробника (модель завантажується один раз на процес)
+_detector = None
+_cadence_params = None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Headless object detection and tracking for video files.")
+    parser.add_argument("--source", action="append", required=True,
+                        help="Video file to process (can be given several times)")
+    parser.add_argument("--out", required=True, help="Output JSONL file with track results")
+    parser.add_argument("--video-out", help="Directory for annotated videos (one file per job)")
+    parser.add_argument("--model", default=detection_params[0], help="Path to YOLO weights")
+    parser.add_argument("--conf", type=float, default=detection_params[1], help="Confidence threshold")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="Split each file into N time chunks (track IDs restart in every chunk)")
+    parser.add_argument("--detect-every", type=int, default=None,
+                        help="Fixed detection interval in frames (default: cadence_params from config)")
+    return parser.parse_args(argv)
+
+
+def make_jobs(sources, shards, video_out=None):
+    """Розбиття файлів на завдання: (джерело, перший кадр, кінцевий кадр або None)."""
+    jobs = []
+    for source in sources:
+        ranges = [(0, None)]
+        if shards > 1:
+            video_cap = cv2.VideoCapture(source)
+            frame_count = int(video_cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            video_cap.release()
+            if frame_count > 0:
+                step = -(-frame_count // shards)
+                ranges = [(start, min(start + step, frame_count)) for start in range(0, frame_count, step)]
+
+        for shard, (start, end) in enumerate(ranges):
+            video_file = None
+            if video_out:
+                name = os.path.splitext(os.path.basename(source))[0]
+                video_file = os.path.join(video_out, f"{name}_part{shard}.mp4" if len(ranges) > 1 else f"{name}.mp4")
+            jobs.append({'job_id': len(jobs), 'source': source, 'shard': shard, 'start': start, 'end': end,
+                         'video_file': video_file})
+    return jobs
+
+
+def _init_worker(model_path, confidence_threshold, detect_every, torch_threads=None, ready=None):
+    """Завантаження моделі в процесі-обробнику; ready — бар'єр, що чекає готовності всіх процесів."""
+    global _detector, _cadence_params
+    try:
+        import torch
+        from modules.object_detection import ObjectDetectionAndTracking
+
+        if torch_threads:
+            # Процеси не конкурують за ядра: кожен отримує свою частку
+            torch.set_num_threads(torch_threads)
+        _detector = ObjectDetectionAndTracking(model_path, confidence_threshold, classes)
+    except Exception as e:
+        if ready is None:
+            raise
+        print(f"Worker initialization error: {e}")
+        ready.abort()
+        raise SystemExit(1)
+    if detect_every:
+        _cadence_params = {'enabled': True, 'min_interval': detect_every, 'max_interval': detect_every}
+    if ready is not None:
+        ready.wait()
+
+
+def _reset_detector():
+    """Новий стан трекера й частоти детекції для кожного завдання."""
+    from modules.cadence import DetectionCadence
+    from modules.motion import MotionGate
+    from modules.object_tracking import ObjectTracking
+
+    _detector.tracker = ObjectTracking()
+    _detector.cadence = DetectionCadence(_cadence_params)
+    _detector.motion_gate = MotionGate()
+    _detector.frame_index = 0
+
+
+def _track_records(job, frame_index, tracks, names):
+    records = []
+    for track in tracks:
+        if not track.is_confirmed():
+            continue
+        confidence = getattr(track, "det_conf", None)
+        records.append({'source': job['source'], 'shard': job['shard'], 'frame': frame_index,
+                        'track_id': track.track_id, 'class': names.get(track.det_class, "Unknown"),
+                        'bbox': [int(value) for value in track.to_ltrb()],
+                        'confidence': None if confidence is None else round(float(confidence), 3),
+                        'predicted': track.time_since_update > 0})
+    return records
+
+
+def process_job(job, part_file):
+    """Обробка одного завдання. Повертає кількість кадрів та часи етапів, мс."""
+    _reset_detector()
+    timings = {stage: [] for stage in STAGES}
+    video_cap = cv2.VideoCapture(job['source'])
+    if not video_cap.isOpened():
+        raise RuntimeError(f"Error: Cannot open video source {job['source']}")
+    if job['start']:
+        video_cap.set(cv2.CAP_PROP_POS_FRAMES, job['start'])
+
+    fps = video_cap.get(cv2.CAP_PROP_FPS) or 30
+    writer = None
+    frame_index = job['start']
+    try:
+        with open(part_file, "w", encoding="utf-8") as out:
+            while job['end'] is None or frame_index < job['end']:
+                start = time.perf_counter()
+                ret, frame = video_cap.read()
+                if not ret:
+                    break
+                read_done = time.perf_counter()
+                frame, tracks = _detector.analyze_frame(frame)
+                analyze_done = time.perf_counter()
+
+                records = _track_records(job, frame_index, tracks, _detector.model.names)
+                if records:
+                    out.write("".join(json.dumps(record) + "\n" for record in records))
+                if job['video_file']:
+                    frame = _detector.annotate_frame(frame, tracks)
+                annotate_done = time.perf_counter()
+                if job['video_file']:
+                    if writer is None:
+                        writer = create_video_writer(job['video_file'], frame.shape[1::-1], fps, 'mp4v')
+                    writer.write(frame)
+                write_done = time.perf_counter()
+
+                for stage, begin, end in zip(STAGES, (start, read_done, analyze_done, annotate_done),
+                                             (read_done, analyze_done, annotate_done, write_done)):
+                    timings[stage].append((end - begin) * 1000)
+                frame_index += 1
+    finally:
+        video_cap.release()
+        if writer is not None:
+            writer.release()
+    return {'frames': frame_index - job['start'], 'timings': timings}
+
+
+def _run_job(args):
+    job, part_file = args
+    try:
+        return job['job_id'], process_job(job, part_file), None
+    except Exception as e:
+        return job['job_id'], None, f"{job['source']} (shard {job['shard']}): {e}"
+
+
+def peak_rss_mb():
+    """Пікове використання пам'яті поточним процесом і дочірніми процесами, МБ."""
+    scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss: байти на macOS, КБ на Linux
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak * scale / (1024 * 1024)
+
+
+def print_summary(frames, elapsed, load_elapsed, timings, errors):
+    print(f"Model load: {load_elapsed:.2f} s")
+    print(f"Processed {frames} frames in {elapsed:.2f} s: {frames / elapsed if elapsed else 0.0:.2f} frames/s")
+    for stage in STAGES:
+        values = timings[stage]
+        print(f"  {stage:<9} p50: {percentile(values, 50):7.2f} ms  p95: {percentile(values, 95):7.2f} ms  "
+              f"p99: {percentile(values, 99):7.2f} ms")
+    print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+    for error in errors:
+        print(f"Error: {error}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.video_out:
+        os.makedirs(args.video_out, exist_ok=True)
+    out_dir = os.path.dirname(os.path.abspath(args.out))
+    os.makedirs(out_dir, exist_ok=True)
+
+    jobs = make_jobs(args.source, args.shards, args.video_out)
+    tasks = [(job, f"{args.out}.part{job['job_id']}") for job in jobs]
+    torch_threads = max(1, (os.cpu_count() or 1) // args.workers) if args.workers > 1 else None
+    init_args = (args.model, args.conf, args.detect_every, torch_threads)
+
+    # Час обробки рахується лише після завантаження й прогріву моделі у всіх процесах
+    load_start = time.perf_counter()
+    if args.workers > 1:
+        context = multiprocessing.get_context("spawn")
+        ready = context.Barrier(args.workers + 1)
+        with context.Pool(args.workers, _init_worker, (*init_args, ready)) as pool:
+            try:
+                ready.wait()
+            except threading.BrokenBarrierError:
+                # Pool перезапускав би процеси, що падають під час ініціалізації
+                pool.terminate()
+                print("Error: failed to load the model in a worker process")
+                return 1
+            start = time.perf_counter()
+            outputs = list(pool.imap_unordered(_run_job, tasks))
+    else:
+        try:
+            _init_worker(*init_args)
+        except Exception as e:
+            print(f"Error: failed to load the model: {e}")
+            return 1
+        start = time.perf_counter()
+        outputs = [_run_job(task) for task in tasks]
+    elapsed = time.perf_counter() - start
+    load_elapsed = start - load_start
+
+    # Об'єднання частин результатів у порядку завдань
+    results = {job_id: result for job_id, result, _ in outputs}
+    errors = [error for _, _, error in outputs if error]
+    frames = 0
+    timings = {stage: [] for stage in STAGES}
+    with open(args.out, "w", encoding="utf-8") as out:
+        for job, part_file in tasks:
+            if os.path.exists(part_file):
+                with open(part_file, encoding="utf-8") as part:
+                    for line in part:
+                        out.write(line)
+                os.remove(part_file)
+            result = results.get(job['job_id'])
+            if result is not None:
+                frames += result['frames']
+                for stage in STAGES:
+                    timings[stage].extend(result['timings'][stage])
+
+    print_summary(frames, elapsed, load_elapsed, timings, errors)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,180 @@
+import csv
+import datetime
+import glob
+import io
+import json
 import os
+import queue
+import threading
+import time
+
+from utils.config import logger_params
+
+CSV_FIELDS = ["time", "event", "frame", "track_id", "class", "x1", "y1", "x2", "y2", "confidence", "message"]
 
 
 class Logger:
-    def __init__(self, output_dir):
+    """Асинхронний структурований журнал: фонова черга, пакетний запис і ротація файлів."""
+
+    def __init__(self, output_dir, params=None):
+        self.params = {**logger_params, **(params or {})}
+        if self.params['format'] not in ("jsonl", "csv"):
+            raise ValueError(f"Unknown log format: {self.params['format']}")
+        if self.params['mode'] not in ("events", "frames"):
+            raise ValueError(f"Unknown log mode: {self.params['mode']}")
+
         self.logs_dir = os.path.join(output_dir, "logs")
         os.makedirs(self.logs_dir, exist_ok=True)
-        self.log_file = os.path.join(self.logs_dir, "activity_log.txt")
-        self._initialize_log()
+        self.log_file = os.path.join(self.logs_dir, f"activity_log.{self.params['format']}")
+
+        self.queue = queue.Queue(maxsize=self.params['max_queue'])
+        self.dropped = 0
+        self.written = 0
+        self._active_tracks = {}  # track_id -> час останньої події 'updated'
+        self._file = None
+        self._opened_at = None
+
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._writer_loop, name="logger", daemon=True)
+        self._thread.start()
 
-    def _initialize_log(self):
-        """Ініціалізація лог-файлу."""
-        with open(self.log_file, "w") as f:
-            f.write("Object Detection and Tracking Log\n")
+    def log_tracks(self, tracks, names, frame_index=None):
+        """Записує стан підтверджених треків кадру (або лише події їхнього життєвого циклу)."""
+        now = time.time()
+        confirmed = [track for track in tracks if track.is_confirmed()]
+
+        if self.params['mode'] == "frames":
+            for track in confirmed:
+                self._enqueue(self._track_record("frame", track, names, frame_index, now))
+            return
+
+        seen = set()
+        for track in confirmed:
+            seen.add(track.track_id)
+            last_update = self._active_tracks.get(track.track_id)
+            if last_update is None:
+                event = "appeared"
+            elif now - last_update >= self.params['update_interval']:
+                event = "updated"
+            else:
+                continue
+            self._active_tracks[track.track_id] = now
+            self._enqueue(self._track_record(event, track, names, frame_index, now))
+
+        for track_id in [track_id for track_id in self._active_tracks if track_id not in seen]:
+            del self._active_tracks[track_id]
+            self._enqueue({"time": self._format_time(now), "event": "lost", "frame": frame_index,
+                           "track_id": track_id})
 
     def log_detections(self, detected_objects):
-        """Записує інформацію про виявлені об'єкти."""
+        """Записує довільні записи (рядки або словники)."""
         if not detected_objects:
             return
-        with open(self.log_file, "a") as f:
-            for obj in detected_objects:
-                f.write(f"{obj}\n")
\ No newline at end of file
+        now = self._format_time(time.time())
+        for obj in detected_objects:
+            self._enqueue(obj if isinstance(obj, dict) else {"time": now, "event": "message", "message": str(obj)})
+
+    def close(self, timeout=5.0):
+        """Зупинка фонового потоку з дописуванням черги на диск."""
+        self._stop_event.set()
+        self._thread.join(timeout)
+
+    def _enqueue(self, record):
+        # Гарячий шлях ніколи не блокується: при переповненні запис відкидається
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _track_record(self, event, track, names, frame_index, now):
+        x1, y1, x2, y2 = (int(value) for value in track.to_ltrb())
+        confidence = getattr(track, "det_conf", None)
+        return {"time": self._format_time(now), "event": event, "frame": frame_index,
+                "track_id": track.track_id, "class": names.get(track.det_class, "Unknown"),
+                "bbox": [x1, y1, x2, y2], "confidence": None if confidence is None else round(float(confidence), 3)}
+
+    @staticmethod
+    def _format_time(timestamp):
+        return datetime.datetime.fromtimestamp(timestamp).isoformat(timespec="milliseconds")
+
+    def _writer_loop(self):
+        """Фоновий запис: збирає записи у пакет і скидає його раз на flush_interval."""
+        self._open()
+        try:
+            while True:
+                stopping = self._stop_event.is_set()
+                batch = self._collect_batch(stopping)
+                if batch:
+                    self._write_batch(batch)
+                elif stopping:
+                    break
+        except Exception as e:
+            print(f"Logger error: {e}")
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _collect_batch(self, stopping):
+        """Записи, що надійшли протягом flush_interval (при зупинці — усе, що є в черзі)."""
+        batch = []
+        deadline = time.monotonic() + self.params['flush_interval']
+        while len(batch) < self.params['max_queue']:
+            try:
+                if stopping:
+                    batch.append(self.queue.get_nowait())
+                else:
+                    batch.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_batch(self, batch):
+        if self._should_rotate():
+            self._rotate()
+        buffer = io.StringIO()
+        if self.params['format'] == "jsonl":
+            for record in batch:
+                buffer.write(json.dumps(record, ensure_ascii=False))
+                buffer.write("\n")
+        else:
+            writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            for record in batch:
+                writer.writerow(self._csv_row(record))
+        self._file.write(buffer.getvalue())
+        self._file.flush()
+        self.written += len(batch)
+
+    @staticmethod
+    def _csv_row(record):
+        row = dict(record)
+        bbox = row.pop("bbox", None)
+        if bbox is not None:
+            row["x1"], row["y1"], row["x2"], row["y2"] = bbox
+        return row
+
+    def _open(self):
+        """Відкриття поточного файлу в режимі дописування (без очищення попереднього вмісту)."""
+        is_new = not os.path.exists(self.log_file) or os.path.getsize(self.log_file) == 0
+        self._file = open(self.log_file, "a", encoding="utf-8", newline="")
+        self._opened_at = time.monotonic()
+        if is_new and self.params['format'] == "csv":
+            csv.writer(self._file).writerow(CSV_FIELDS)
+
+    def _should_rotate(self):
+        size_exceeded = self.params['max_bytes'] and self._file.tell() >= self.params['max_bytes']
+        time_exceeded = self.params['rotate_interval'] and \
+            time.monotonic() - self._opened_at >= self.params['rotate_interval'] and self._file.tell() > 0
+        return bool(size_exceeded or time_exceeded)
+
+    def _rotate(self):
+        """Перейменування поточного файлу та видалення найстаріших архівів понад backup_count."""
+        self._file.close()
+        base, ext = os.path.splitext(self.log_file)
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        os.replace(self.log_file, f"{base}_{timestamp}{ext}")
+
+        backups = sorted(glob.glob(f"{base}_*{ext}"))
+        for old_file in backups[:max(0, len(backups) - self.params['backup_count'])]:
+            os.remove(old_file)
+        self._open()
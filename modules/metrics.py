@@ -0,0 +1,225 @@
+import collections
+import contextlib
+import http.server
+import json
+import math
+import threading
+import time
+
+from utils.config import metrics_params
+
+
+def percentile(values, q):
+    """Перцентиль q (0..100) за найближчим рангом."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class FpsMeter:
+    """Експоненційно згладжений FPS за монотонним годинником."""
+
+    def __init__(self, smoothing=None):
+        self.smoothing = metrics_params['fps_smoothing'] if smoothing is None else smoothing
+        self.fps = 0.0
+        self.frames = 0
+        self._last_time = None
+
+    def tick(self, now=None):
+        now = time.monotonic() if now is None else now
+        if self._last_time is not None and now > self._last_time:
+            instant_fps = 1.0 / (now - self._last_time)
+            self.fps = instant_fps if self.fps == 0.0 else \
+                self.smoothing * self.fps + (1 - self.smoothing) * instant_fps
+        self._last_time = now
+        self.frames += 1
+        return self.fps
+
+
+class LatencyWindow:
+    """Ковзне вікно затримок етапу з перцентилями p50/p95/p99."""
+
+    def __init__(self, size=None):
+        self.values = collections.deque(maxlen=size or metrics_params['window'])
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, elapsed_ms):
+        self.values.append(elapsed_ms)
+        self.count += 1
+        self.total_ms += elapsed_ms
+
+    def summary(self):
+        values = list(self.values)
+        return {'count': self.count,
+                'last_ms': values[-1] if values else 0.0,
+                'mean_ms': sum(values) / len(values) if values else 0.0,
+                'p50_ms': percentile(values, 50),
+                'p95_ms': percentile(values, 95),
+                'p99_ms': percentile(values, 99)}
+
+
+class MetricsRegistry:
+    """Таймери етапів, FPS, лічильники та датчики гарячого шляху."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.fps_meters = {}
+        self.counters = collections.Counter()
+        self.gauges = {}
+
+    @contextlib.contextmanager
+    def timer(self, stage):
+        """Вимірювання тривалості блоку коду: with metrics.timer('infer'): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter() - start) * 1000)
+
+    def observe(self, stage, elapsed_ms):
+        with self._lock:
+            window = self.stages.get(stage)
+            if window is None:
+                window = self.stages[stage] = LatencyWindow()
+            window.observe(elapsed_ms)
+
+    def tick(self, name):
+        """Позначка обробленого кадру для FPS name. Повертає поточний FPS."""
+        with self._lock:
+            meter = self.fps_meters.get(name)
+            if meter is None:
+                meter = self.fps_meters[name] = FpsMeter()
+            return meter.tick()
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def set_gauge(self, name, value):
+        """Значення датчика; можна передати функцію, яка обчислюється під час зчитування."""
+        with self._lock:
+            self.gauges[name] = value
+
+    def snapshot(self):
+        """Поточний стан усіх метрик у вигляді словника."""
+        with self._lock:
+            stages = {stage: window.summary() for stage, window in self.stages.items()}
+            fps = {name: meter.fps for name, meter in self.fps_meters.items()}
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+        return {'timestamp': time.time(),
+                'stages': stages,
+                'fps': fps,
+                'counters': counters,
+                'gauges': {name: value() if callable(value) else value for name, value in gauges.items()}}
+
+    def to_prometheus(self):
+        """Метрики у текстовому форматі Prometheus."""
+        snapshot = self.snapshot()
+        lines = ["# TYPE vdt_stage_latency_ms summary"]
+        for stage, summary in snapshot['stages'].items():
+            for quantile, key in (("0.5", 'p50_ms'), ("0.95", 'p95_ms'), ("0.99", 'p99_ms')):
+                lines.append(f'vdt_stage_latency_ms{{stage="{stage}",quantile="{quantile}"}} {summary[key]:.3f}')
+            lines.append(f'vdt_stage_latency_ms_count{{stage="{stage}"}} {summary["count"]}')
+        lines.append("# TYPE vdt_fps gauge")
+        lines.extend(f'vdt_fps{{name="{name}"}} {value:.3f}' for name, value in snapshot['fps'].items())
+        lines.append("# TYPE vdt_counter_total counter")
+        lines.extend(f'vdt_counter_total{{name="{name}"}} {value}' for name, value in snapshot['counters'].items())
+        lines.append("# TYPE vdt_gauge gauge")
+        lines.extend(f'vdt_gauge{{name="{name}"}} {value}' for name, value in snapshot['gauges'].items())
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.fps_meters.clear()
+            self.counters.clear()
+            self.gauges.clear()
+
+
+# Спільний реєстр процесу
+metrics = MetricsRegistry()
+
+
+class MetricsServer:
+    """Локальний HTTP-сервер: /metrics (Prometheus) та /metrics.json."""
+
+    def __init__(self, registry=metrics, host="127.0.0.1", port=None):
+        registry_ref = registry
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, content_type = registry_ref.to_prometheus(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, content_type = json.dumps(registry_ref.snapshot()), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        port = port if port is not None else metrics_params['http_port']
+        self.server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics-server", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        print(f"Metrics available at http://{self.server.server_address[0]}:{self.server.server_address[1]}/metrics")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class JsonDumper:
+    """Періодичний запис знімка метрик у JSON-файл."""
+
+    def __init__(self, path=None, interval=None, registry=metrics):
+        self.path = path or metrics_params['json_dump_path']
+        self.interval = interval or metrics_params['json_dump_interval']
+        self.registry = registry
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._loop, name="metrics-dump", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join(self.interval)
+        self.dump()
+
+    def dump(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.registry.snapshot(), f, indent=2)
+
+    def _loop(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.dump()
+            except OSError as e:
+                print(f"Metrics dump error: {e}")
+
+
+def start_exporters():
+    """Запуск експортерів, увімкнених у utils.config.metrics_params."""
+    exporters = []
+    if metrics_params['http_port']:
+        exporters.append(MetricsServer().start())
+    if metrics_params['json_dump_path']:
+        exporters.append(JsonDumper().start())
+    return exporters
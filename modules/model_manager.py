@@ -0,0 +1,139 @@
+import importlib.util
+import os
+import time
+
+from utils.config import model_params
+
+# Формат -> (суфікс експортованих ваг, модуль середовища виконання)
+EXPORT_FORMATS = {
+    'openvino': ("_openvino_model", "openvino"),
+    'onnx': (".onnx", "onnxruntime"),
+    'torchscript': (".torchscript", "torch"),
+    'pytorch': (".pt", "torch"),
+}
+
+
+class ModelManager:
+    """Завантаження YOLO: пошук ваг у кеші, оптимізований для CPU експорт, потоки та прогрів."""
+
+    def __init__(self, model_path, input_size=640, params=None):
+        self.params = {**model_params, **(params or {})}
+        unknown = [name for name in self.params['formats'] if name not in EXPORT_FORMATS]
+        if unknown:
+            raise ValueError(f"Unknown model formats: {unknown}")
+
+        self.model_path = model_path
+        self.input_size = input_size
+        self.device = None
+        self.format = None
+        self.weights = None
+        self.max_batch = None  # Максимальний розмір пакета моделі, None — без обмеження
+        self.timings = {}
+
+    def load(self):
+        """Завантаження першого доступного формату з model_params['formats'] та прогрів."""
+        import torch
+        from ultralytics import YOLO
+
+        if self.params['num_threads']:
+            torch.set_num_threads(self.params['num_threads'])
+
+        start = time.perf_counter()
+        weights = self.resolve_weights(self.model_path)
+        self.device = self._select_device(torch)
+
+        model = None
+        for name in self.params['formats']:
+            # Експортовані формати використовуються лише на CPU і лише за наявності середовища виконання
+            if not self._runtime_available(name) or (name != 'pytorch' and self.device.type != "cpu"):
+                continue
+            path = weights if name == 'pytorch' else self._prepare_export(YOLO, weights, name)
+            if path is None:
+                continue
+            try:
+                model = YOLO(path, task="detect")
+                if name == 'pytorch':
+                    model.to(self.device)
+                self.format, self.weights = name, path
+                break
+            except Exception as e:
+                print(f"Failed to load {name} model from {path}: {e}; falling back")
+
+        if model is None:
+            raise RuntimeError(f"Error: Cannot load model {self.model_path}")
+        self.timings['load_ms'] = (time.perf_counter() - start) * 1000
+
+        self.warmup(model, torch)
+        self.max_batch = self._probe_batch(model, torch)
+        print(f"Model {self.weights} ({self.format}) on {self.device}: load {self.timings['load_ms']:.0f} ms, "
+              f"warmup {self.timings['warmup_ms']:.0f} ms, max batch {self.max_batch or 'dynamic'}")
+        return model
+
+    def resolve_weights(self, model_path):
+        """Шлях до ваг: як задано, інакше в каталозі кешу (відомі ваги ultralytics завантажить туди)."""
+        if os.path.exists(model_path):
+            return model_path
+        cache_dir = os.path.expanduser(self.params['cache_dir'])
+        os.makedirs(cache_dir, exist_ok=True)
+        return os.path.join(cache_dir, os.path.basename(model_path))
+
+    def warmup(self, model, torch):
+        """Прогрів: перші проходи платять за ліниву ініціалізацію ще до першого кадру."""
+        start = time.perf_counter()
+        dummy = torch.zeros((1, 3, self.input_size, self.input_size), device=self.device)
+        with torch.no_grad():
+            for _ in range(self.params['warmup_runs']):
+                model(dummy, verbose=False)
+        self.timings['warmup_ms'] = (time.perf_counter() - start) * 1000
+
+    def _probe_batch(self, model, torch):
+        """Розмір пакета, який приймає модель: TorchScript трасується з пакетом 1, статичні ONNX/OpenVINO
+        з кешу теж можуть мати фіксований пакет — для них перевіряється прохід із двома кадрами."""
+        if self.format == 'pytorch':
+            return None
+        if self.format == 'torchscript':
+            return 1
+        dummy = torch.zeros((2, 3, self.input_size, self.input_size), device=self.device)
+        try:
+            with torch.no_grad():
+                results = model(dummy, verbose=False)
+            return None if len(results) == 2 else 1
+        except Exception:
+            return 1
+
+    def _select_device(self, torch):
+        if self.params['device']:
+            return torch.device(self.params['device'])
+        if torch.cuda.is_available():
+            return torch.device("cuda")
+        if torch.backends.mps.is_available():
+            return torch.device("mps")
+        return torch.device("cpu")
+
+    @staticmethod
+    def _export_path(weights, name):
+        suffix = EXPORT_FORMATS[name][0]
+        return os.path.splitext(weights)[0] + suffix
+
+    @staticmethod
+    def _runtime_available(name):
+        return importlib.util.find_spec(EXPORT_FORMATS[name][1]) is not None
+
+    def _prepare_export(self, yolo_class, weights, name):
+        """Шлях до готового експорту; за потреби (export_missing) створює його з ваг PyTorch."""
+        path = self._export_path(weights, name)
+        if os.path.exists(path):
+            return path
+        if self.params['export_missing'] and os.path.exists(weights):
+            try:
+                return self._export(yolo_class, weights, name)
+            except Exception as e:
+                print(f"Failed to export {name} model: {e}")
+        return None
+
+    def _export(self, yolo_class, weights, name):
+        """Одноразовий експорт ваг у кеш (динамічний розмір пакета для ONNX/OpenVINO, TorchScript — пакет 1)."""
+        start = time.perf_counter()
+        path = yolo_class(weights).export(format=name, imgsz=self.input_size, dynamic=name != 'torchscript')
+        self.timings[f'export_{name}_ms'] = (time.perf_counter() - start) * 1000
+        return path
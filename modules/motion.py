@@ -0,0 +1,132 @@
+import cv2
+import numpy as np
+
+from utils.helper import merge_boxes
+from utils.config import motion_params
+
+DETECTION_AREAS = ('full', 'roi', 'motion')
+
+
+class MotionGate:
+    """Дешевий аналіз руху на зменшеному кадрі перед запуском детектора.
+
+    Повертає області руху в координатах кадру (з урахуванням полігонів ROI) та області,
+    на яких варто запускати детекцію.
+    """
+
+    def __init__(self, params=None):
+        self.params = {**motion_params, **(params or {})}
+        if self.params['method'] not in ('mog2', 'diff'):
+            raise ValueError(f"Unknown motion method: {self.params['method']}")
+        if self.params['detection_area'] not in DETECTION_AREAS:
+            raise ValueError(f"Unknown detection area: {self.params['detection_area']}")
+        self.enabled = self.params['enabled']
+
+        self.motion_boxes = []
+        self.motion_frames = 0
+        self.idle_frames = 0
+        self._subtractor = None
+        self._previous = None
+        self._roi_mask = None
+
+    def update(self, frame):
+        """Аналіз кадру. Повертає рамки руху [x1, y1, x2, y2] у координатах кадру; [] — руху немає."""
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.params['width'] / width)
+        small_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        small = cv2.resize(frame, small_size, interpolation=cv2.INTER_AREA) if scale < 1 else frame
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+        mask = self._foreground(gray)
+        roi_mask = self._roi(gray.shape)
+        if roi_mask is not None:
+            cv2.bitwise_and(mask, roi_mask, dst=mask)
+        mask = cv2.dilate(mask, None, iterations=2)
+
+        min_area = self.params['min_area'] * mask.size
+        boxes = []
+        for contour in cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[-2]:
+            if cv2.contourArea(contour) < min_area:
+                continue
+            x, y, box_width, box_height = cv2.boundingRect(contour)
+            boxes.append((int(x / scale), int(y / scale),
+                          int((x + box_width) / scale), int((y + box_height) / scale)))
+
+        self.motion_boxes = boxes
+        if boxes:
+            self.motion_frames += 1
+        else:
+            self.idle_frames += 1
+        return boxes
+
+    def regions(self, frame_shape, motion_boxes, track_boxes=()):
+        """Області детекції [x1, y1, x2, y2] для detection_area або None — весь кадр."""
+        area = self.params['detection_area']
+        if area == 'full':
+            return None
+        if area == 'roi':
+            boxes = self.roi_boxes(frame_shape)
+            if not boxes:
+                return None
+        else:
+            # Треки без руху теж потребують детекцій, інакше вони загубляться
+            boxes = list(motion_boxes) + [tuple(box) for box in track_boxes]
+
+        height, width = frame_shape[:2]
+        regions = merge_boxes([self._expand(box, width, height) for box in boxes])
+        covered = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in regions)
+        if covered > self.params['max_coverage'] * width * height:
+            return None
+        return regions
+
+    def roi_boxes(self, frame_shape):
+        """Охоплюючі прямокутники полігонів ROI у координатах кадру."""
+        height, width = frame_shape[:2]
+        boxes = []
+        for polygon in self.params['roi']:
+            points = np.asarray(polygon, dtype=np.float32) * (width, height)
+            x1, y1 = points.min(axis=0)
+            x2, y2 = points.max(axis=0)
+            boxes.append((int(x1), int(y1), int(np.ceil(x2)), int(np.ceil(y2))))
+        return boxes
+
+    def stats(self):
+        total = self.motion_frames + self.idle_frames
+        return {'motion_frames': self.motion_frames,
+                'idle_frames': self.idle_frames,
+                'idle_ratio': self.idle_frames / total if total else 0.0}
+
+    def _foreground(self, gray):
+        if self.params['method'] == 'mog2':
+            if self._subtractor is None:
+                self._subtractor = cv2.createBackgroundSubtractorMOG2(detectShadows=False)
+            return self._subtractor.apply(gray)
+
+        previous, self._previous = self._previous, gray
+        if previous is None or previous.shape != gray.shape:
+            return np.zeros_like(gray)
+        difference = cv2.absdiff(gray, previous)
+        return cv2.threshold(difference, self.params['diff_threshold'], 255, cv2.THRESH_BINARY)[1]
+
+    def _roi(self, shape):
+        """Маска полігонів ROI у роздільній здатності аналізу руху (кешується)."""
+        if not self.params['roi']:
+            return None
+        if self._roi_mask is None or self._roi_mask.shape != shape:
+            height, width = shape
+            self._roi_mask = np.zeros(shape, dtype=np.uint8)
+            polygons = [np.round(np.asarray(polygon, dtype=np.float32) * (width, height)).astype(np.int32)
+                        for polygon in self.params['roi']]
+            cv2.fillPoly(self._roi_mask, polygons, 255)
+        return self._roi_mask
+
+    def _expand(self, box, width, height):
+        """Поле навколо області та мінімальний розмір, обмежені межами кадру."""
+        padding, min_size = self.params['padding'], self.params['min_region_size']
+        x1, y1, x2, y2 = box
+        x1, y1, x2, y2 = x1 - padding, y1 - padding, x2 + padding, y2 + padding
+        if x2 - x1 < min_size:
+            x1, x2 = (x1 + x2 - min_size) // 2, (x1 + x2 + min_size) // 2
+        if y2 - y1 < min_size:
+            y1, y2 = (y1 + y2 - min_size) // 2, (y1 + y2 + min_size) // 2
+        return (int(max(0, x1)), int(max(0, y1)), int(min(width, x2)), int(min(height, y2)))
@@ -0,0 +1,205 @@
+import threading
+import time
+
+from modules.capture import AsyncCapture
+from modules.embedding import get_embedding_stage
+from modules.metrics import metrics, FpsMeter, LatencyWindow
+from modules.object_tracking import ObjectTracking
+from modules.trackers import DeepSortBackend, to_deepsort
+from utils.config import multi_stream_params
+
+
+class StreamStats:
+    """Статистика одного потоку: FPS (EWMA) та затримка від захоплення до трекінгу."""
+
+    def __init__(self, stream_id):
+        self.name = f"stream_{stream_id}"
+        self.fps_meter = FpsMeter()
+        self.latency = LatencyWindow()
+
+    @property
+    def frames(self):
+        return self.fps_meter.frames
+
+    @property
+    def fps(self):
+        return self.fps_meter.fps
+
+    def update(self, capture_time):
+        now = time.monotonic()
+        latency_ms = (now - capture_time) * 1000
+        self.fps_meter.tick(now)
+        self.latency.observe(latency_ms)
+        metrics.observe(f"{self.name}_latency", latency_ms)
+
+
+class StreamSource:
+    """Одне джерело відео з власним потоком захоплення та власним трекером."""
+
+    def __init__(self, stream_id, source, queue_size, on_frame=None):
+        self.stream_id = stream_id
+        self.source = source
+        # Живі потоки — лише найсвіжіший кадр і перепідключення, файли — без втрат
+        self.capture = AsyncCapture(source, {'queue_size': queue_size}, on_frame)
+        self.queue = self.capture.queue
+        self.tracker = ObjectTracking()
+        self.stats = StreamStats(stream_id)
+
+    def is_exhausted(self):
+        return self.capture.is_exhausted()
+
+
+class MultiStreamDetector:
+    """Спільна модель YOLO для багатьох джерел з динамічним пакетуванням кадрів."""
+
+    def __init__(self, detector, sources=None, max_batch_size=None, max_wait_ms=None, queue_size=None,
+                 on_result=None):
+        self.detector = detector
+        self.on_result = on_result
+        self.max_batch_size = max_batch_size or multi_stream_params['max_batch_size']
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else multi_stream_params['max_wait_ms']) / 1000
+        queue_size = queue_size or multi_stream_params['queue_size']
+        sources = sources if sources is not None else multi_stream_params['sources']
+
+        self.stop_event = threading.Event()
+        self.frame_event = threading.Event()
+        self.streams = [StreamSource(stream_id, source, queue_size, self.frame_event.set)
+                        for stream_id, source in enumerate(sources)]
+        self._next_stream = 0
+
+    def start(self):
+        """Запуск потоків захоплення для всіх джерел."""
+        for stream in self.streams:
+            stream.capture.start()
+
+    def stop(self, timeout=2.0):
+        self.stop_event.set()
+        self.frame_event.set()
+        for stream in self.streams:
+            stream.capture.release(timeout)
+
+    def run(self, stats_interval=None):
+        """Основний цикл: збір пакета -> один прохід моделі -> трекінг для кожного потоку."""
+        stats_interval = stats_interval if stats_interval is not None else multi_stream_params['stats_interval']
+        last_report = time.monotonic()
+        self.start()
+        try:
+            while not self.stop_event.is_set():
+                batch = self._collect_batch()
+                if not batch:
+                    if all(stream.is_exhausted() for stream in self.streams):
+                        break
+                    continue
+                self.process_batch(batch)
+
+                if stats_interval and time.monotonic() - last_report >= stats_interval:
+                    self.print_stats()
+                    last_report = time.monotonic()
+        finally:
+            self.stop()
+            self.print_stats()
+
+    def process_batch(self, batch):
+        """Обробка пакета елементів (потік, час захоплення, кадр)."""
+        filter_chain = self.detector.filter_chain
+        if not filter_chain.at_model_resolution:
+            # Та сама фільтрація на повному кадрі, що й в analyze_frame
+            with metrics.timer("filter"):
+                for _, _, frame in batch:
+                    filter_chain.apply(frame)
+
+        outputs = self.detector.detect([frame for _, _, frame in batch])
+        embeds = self._batch_embeddings(batch, outputs)
+        for (stream, capture_time, frame), results, frame_embeds in zip(batch, outputs, embeds):
+            # Трекер оновлюється і без детекцій, щоб треки старішали та видалялися
+            tracks = stream.tracker.update_tracks(results, frame=frame, embeds=frame_embeds)
+            stream.stats.update(capture_time)
+            if self.on_result is not None:
+                self.on_result(stream.stream_id, frame, tracks)
+
+    @staticmethod
+    def _batch_embeddings(batch, outputs):
+        """Ембединги DeepSort для всіх кадрів пакета одним проходом ембедера."""
+        embeds = [None] * len(batch)
+        requests, positions = [], []
+        for position, ((stream, _, frame), results) in enumerate(zip(batch, outputs)):
+            backend = stream.tracker.tracker
+            if len(results) and isinstance(backend, DeepSortBackend):
+                requests.append((frame, to_deepsort(results), backend.cached_embeddings(results)))
+                positions.append(position)
+        if requests:
+            for position, frame_embeds in zip(positions, get_embedding_stage().compute(requests)):
+                embeds[position] = frame_embeds
+        return embeds
+
+    def _collect_batch(self):
+        """Збір пакета до max_batch_size кадрів або до спливу max_wait від першого кадру."""
+        batch = []
+        deadline = None
+        while not self.stop_event.is_set():
+            self.frame_event.clear()
+            self._fill_batch(batch)
+            if len(batch) >= self.max_batch_size:
+                break
+
+            now = time.monotonic()
+            if batch and deadline is None:
+                deadline = now + self.max_wait
+            if deadline is not None and now >= deadline:
+                break
+            if not batch and all(stream.is_exhausted() for stream in self.streams):
+                break
+            self.frame_event.wait(deadline - now if deadline is not None else 0.1)
+        return batch
+
+    def _fill_batch(self, batch):
+        """Обхід джерел по колу, щоб жодне не отримувало перевагу."""
+        count = len(self.streams)
+        added = True
+        while added and len(batch) < self.max_batch_size:
+            added = False
+            for offset in range(count):
+                stream = self.streams[(self._next_stream + offset) % count]
+                item = stream.queue.get_nowait()
+                if item is None:
+                    continue
+                batch.append((stream, *item))
+                added = True
+                if len(batch) >= self.max_batch_size:
+                    break
+        self._next_stream = (self._next_stream + 1) % count
+
+    def stats(self):
+        """Статистика по кожному потоку."""
+        return {stream.stream_id: {'source': stream.source,
+                                   'frames': stream.stats.frames,
+                                   'fps': stream.stats.fps,
+                                   'latency': stream.stats.latency.summary(),
+                                   'dropped': stream.queue.dropped,
+                                   'capture': stream.capture.stats()}
+                for stream in self.streams}
+
+    def print_stats(self):
+        for stream_id, stats in self.stats().items():
+            latency = stats['latency']
+            print(f"Stream {stream_id} ({stats['source']}): {stats['frames']} frames, FPS: {stats['fps']:.2f}, "
+                  f"latency p50/p95: {latency['p50_ms']:.1f}/{latency['p95_ms']:.1f} ms, dropped: {stats['dropped']}, "
+                  f"decode p50: {stats['capture']['decode']['p50_ms']:.1f} ms, "
+                  f"reconnects: {stats['capture']['reconnects']}")
+
+
+def main():
+    from modules.object_detection import ObjectDetectionAndTracking
+    from utils.config import detection_params, classes
+
+    try:
+        detector = ObjectDetectionAndTracking(*detection_params, classes)
+        MultiStreamDetector(detector).run()
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+import argparse
+import json
+import multiprocessing
+import queue
+import sys
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from modules.metrics import FpsMeter
+from utils.helper import create_video_writer, draw_datetime, draw_text, is_live_source
+from utils.config import detection_params, multiprocess_params, classes
+
+
+class SharedFrameRing:
+    """Кільце попередньо виділених слотів кадрів у multiprocessing.shared_memory.
+
+    Між процесами передаються лише індекси слотів, самі кадри не серіалізуються.
+    """
+
+    def __init__(self, slots, frame_shape, name=None):
+        self.slots = slots
+        self.frame_shape = tuple(frame_shape)
+        self.owner = name is None
+        size = slots * int(np.prod(self.frame_shape))
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self.frames = np.ndarray((slots, *self.frame_shape), dtype=np.uint8, buffer=self.shm.buf)
+
+    @property
+    def spec(self):
+        """Параметри для підключення до кільця з іншого процесу."""
+        return self.slots, self.frame_shape, self.shm.name
+
+    def close(self):
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _get(source_queue, stop_event):
+    """Наступний елемент черги або None після зупинки."""
+    while not stop_event.is_set():
+        try:
+            return source_queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return None
+
+
+def _read_into(video_cap, slot):
+    """Декодування кадру одразу в слот спільної пам'яті."""
+    ret, image = video_cap.read(slot)
+    if ret and image.ctypes.data != slot.ctypes.data:
+        # Розмір кадру змінився (наприклад, після перепідключення)
+        cv2.resize(image, slot.shape[1::-1], dst=slot)
+    return ret
+
+
+def _capture_process(source, ring_spec, free_slots, detect_queue, track_queue, stop_event, detect_workers,
+                     detect_every, counters):
+    """Процес захоплення: кадр у вільний слот, індекс слота — у чергу детекції або одразу трекеру."""
+    ring = SharedFrameRing(*ring_spec)
+    live = is_live_source(source)
+    video_cap = cv2.VideoCapture(source)
+    sequence = 0
+    try:
+        while not stop_event.is_set():
+            try:
+                slot = free_slots.get_nowait() if live else free_slots.get(timeout=0.1)
+            except queue.Empty:
+                if live:
+                    # Живе джерело не чекає на вільний слот: кадр пропускається без retrieve()
+                    if not video_cap.grab():
+                        break
+                    counters['dropped'].value += 1
+                continue
+
+            if not _read_into(video_cap, ring.frames[slot]):
+                free_slots.put(slot)
+                break
+            counters['captured'].value += 1
+            if sequence % detect_every == 0:
+                detect_queue.put((sequence, slot))
+            else:
+                track_queue.put((sequence, slot, None, None))
+            sequence += 1
+    except Exception as e:
+        print(f"Capture process error: {e}")
+        stop_event.set()
+    finally:
+        for _ in range(detect_workers):
+            detect_queue.put(None)
+        track_queue.put(None)
+        video_cap.release()
+        ring.close()
+
+
+def _detect_process(ring_spec, model_path, confidence_threshold, torch_threads, detect_queue, track_queue,
+                    stop_event):
+    """Процес детекції: фільтрація кадру в слоті та YOLO; трекеру передається лише масив детекцій
+    (з першим результатом — ще й назви класів моделі)."""
+    ring = SharedFrameRing(*ring_spec)
+    try:
+        import torch
+        from modules.object_detection import ObjectDetectionAndTracking
+
+        if torch_threads:
+            torch.set_num_threads(torch_threads)
+        detector = ObjectDetectionAndTracking(model_path, confidence_threshold, classes)
+        names = detector.model.names
+        while True:
+            item = _get(detect_queue, stop_event)
+            if item is None:
+                break
+            sequence, slot = item
+            frame = ring.frames[slot]
+            if not detector.filter_chain.at_model_resolution:
+                detector.filter_chain.apply(frame)
+            track_queue.put((sequence, slot, detector.detect([frame])[0], names))
+            names = None
+    except Exception as e:
+        print(f"Detection process error: {e}")
+        stop_event.set()
+    finally:
+        track_queue.put(None)
+        ring.close()
+
+
+def _track_process(ring_spec, backend, track_queue, output_queue, stop_event, producers):
+    """Процес трекінгу й рендерингу: відновлення порядку кадрів, трекер, оверлеї."""
+    ring = SharedFrameRing(*ring_spec)
+    try:
+        from modules.object_tracking import ObjectTracking
+        from modules.preprocessing import FilterChain
+
+        tracking = ObjectTracking(backend)
+        filter_chain = FilterChain()
+        fps_meter = FpsMeter()
+        names = {}
+        pending = {}
+        next_sequence = 0
+        finished = 0
+        while finished < producers:
+            item = _get(track_queue, stop_event)
+            if item is None:
+                if stop_event.is_set():
+                    break
+                finished += 1
+                continue
+
+            sequence, slot, detections, model_names = item
+            if model_names is not None:
+                # Назви класів моделі надходять із першим результатом кожного процесу детекції;
+                # кадр 0 завжди з детекцією, тож вони відомі до першого запису
+                names = model_names
+            pending[sequence] = (slot, detections)
+            # Кадри від кількох процесів детекції надходять не по порядку
+            while next_sequence in pending:
+                slot, detections = pending.pop(next_sequence)
+                frame = ring.frames[slot]
+                if detections is None:
+                    if not filter_chain.at_model_resolution:
+                        filter_chain.apply(frame)
+                    tracks = tracking.predict_tracks(frame)
+                else:
+                    tracks = tracking.update_tracks(detections, frame)
+                draw_datetime(frame)
+                draw_text(frame, f"FPS: {fps_meter.tick():.2f}", (10, 30), (0, 255, 0))
+                output_queue.put((next_sequence, slot, _track_records(tracks, names)))
+                next_sequence += 1
+    except Exception as e:
+        print(f"Tracking process error: {e}")
+        stop_event.set()
+    finally:
+        output_queue.put(None)
+        ring.close()
+
+
+def _track_records(tracks, names):
+    records = []
+    for track in tracks:
+        if not track.is_confirmed():
+            continue
+        confidence = getattr(track, "det_conf", None)
+        records.append({'track_id': track.track_id,
+                        'class': names.get(track.det_class, "Unknown"),
+                        'bbox': [int(value) for value in track.to_ltrb()],
+                        'confidence': None if confidence is None else round(float(confidence), 3),
+                        'predicted': track.time_since_update > 0})
+    return records
+
+
+class MultiProcessPipeline:
+    """Захоплення, детекція (кілька процесів) і трекінг/рендеринг в окремих процесах для одного потоку.
+
+    Кадри лежать у кільці спільної пам'яті; черги передають лише індекси слотів і масиви детекцій.
+    Трекінг послідовний за своєю природою, тому процес трекінгу відновлює порядок кадрів за номером.
+    """
+
+    def __init__(self, source, model_path=None, confidence_threshold=None, detect_workers=None, slots=None,
+                 detect_every=None, backend=None, params=None):
+        self.params = {**multiprocess_params, **(params or {})}
+        self.source = source
+        self.model_path = model_path or detection_params[0]
+        self.confidence_threshold = confidence_threshold or detection_params[1]
+        self.detect_workers = max(1, detect_workers or self.params['detect_workers'])
+        self.detect_every = max(1, detect_every or self.params['detect_every'])
+        self.backend = backend
+
+        frame_shape, self.fps = self._probe(source)
+        self.ring = SharedFrameRing(slots or self.params['slots'], frame_shape)
+        self.context = multiprocessing.get_context("spawn")
+        self.free_slots = self.context.Queue()
+        for slot in range(self.ring.slots):
+            self.free_slots.put(slot)
+        self.detect_queue = self.context.Queue()
+        self.track_queue = self.context.Queue()
+        self.output_queue = self.context.Queue()
+        self.stop_event = self.context.Event()
+        self.counters = {'captured': self.context.Value('q', 0), 'dropped': self.context.Value('q', 0)}
+        self.processes = []
+        self.frames = 0
+        self.elapsed = 0.0
+
+    @staticmethod
+    def _probe(source):
+        """Розмір кадру та FPS джерела."""
+        video_cap = cv2.VideoCapture(source)
+        ret, frame = video_cap.read()
+        fps = video_cap.get(cv2.CAP_PROP_FPS) or 30
+        video_cap.release()
+        if not ret:
+            raise RuntimeError(f"Error: Cannot open video source {source}")
+        return frame.shape, fps
+
+    def start(self):
+        spec = self.ring.spec
+        self.processes = [self.context.Process(
+            target=_capture_process, name="mp-capture",
+            args=(self.source, spec, self.free_slots, self.detect_queue, self.track_queue, self.stop_event,
+                  self.detect_workers, self.detect_every, self.counters))]
+        self.processes += [self.context.Process(
+            target=_detect_process, name=f"mp-detect-{index}",
+            args=(spec, self.model_path, self.confidence_threshold, self.params['torch_threads'],
+                  self.detect_queue, self.track_queue, self.stop_event))
+            for index in range(self.detect_workers)]
+        self.processes.append(self.context.Process(
+            target=_track_process, name="mp-track",
+            args=(spec, self.backend, self.track_queue, self.output_queue, self.stop_event,
+                  self.detect_workers + 1)))
+        for process in self.processes:
+            process.start()
+
+    def run(self, on_frame=None):
+        """Обробка потоку до кінця. on_frame(номер, кадр, треки) отримує кадр, дійсний лише під час виклику."""
+        start = time.perf_counter()
+        self.start()
+        try:
+            while True:
+                try:
+                    item = self.output_queue.get(timeout=0.5)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in self.processes):
+                        break
+                    continue
+                if item is None:
+                    break
+                sequence, slot, records = item
+                if on_frame is not None:
+                    on_frame(sequence, self.ring.frames[slot], records)
+                self.free_slots.put(slot)
+                self.frames += 1
+        finally:
+            self.elapsed = time.perf_counter() - start
+            self.stop()
+
+    def stop(self, timeout=5.0):
+        self.stop_event.set()
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        if self.ring.frames is not None:
+            self.ring.close()
+
+    def stats(self):
+        return {'frames': self.frames,
+                'captured': self.counters['captured'].value,
+                'dropped': self.counters['dropped'].value,
+                'elapsed_s': self.elapsed,
+                'fps': self.frames / self.elapsed if self.elapsed else 0.0,
+                'detect_workers': self.detect_workers}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-process detection and tracking for one video stream.")
+    parser.add_argument("--source", required=True, help="Video file, camera index or stream URL")
+    parser.add_argument("--out", help="Output JSONL file with track results")
+    parser.add_argument("--video-out", help="Annotated output video file")
+    parser.add_argument("--model", default=detection_params[0], help="Path to YOLO weights")
+    parser.add_argument("--conf", type=float, default=detection_params[1], help="Confidence threshold")
+    parser.add_argument("--detect-workers", type=int, default=None, help="Number of detection processes")
+    parser.add_argument("--slots", type=int, default=None, help="Shared-memory frame slots")
+    parser.add_argument("--detect-every", type=int, default=None, help="Detection interval in frames")
+    parser.add_argument("--tracker", default=None, help="Tracker backend")
+    args = parser.parse_args(argv)
+
+    source = int(args.source) if args.source.isdigit() else args.source
+    pipeline = MultiProcessPipeline(source, args.model, args.conf, args.detect_workers, args.slots,
+                                    args.detect_every, args.tracker)
+    out = open(args.out, "w", encoding="utf-8") if args.out else None
+    writer = None
+
+    def on_frame(sequence, frame, records):
+        nonlocal writer
+        if out is not None:
+            out.write("".join(json.dumps({'frame': sequence, **record}) + "\n" for record in records))
+        if args.video_out:
+            if writer is None:
+                writer = create_video_writer(args.video_out, frame.shape[1::-1], pipeline.fps, 'mp4v')
+            writer.write(frame)
+
+    try:
+        pipeline.run(on_frame)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if out is not None:
+            out.close()
+        if writer is not None:
+            writer.release()
+
+    stats = pipeline.stats()
+    print(f"Processed {stats['frames']} frames in {stats['elapsed_s']:.2f} s: {stats['fps']:.2f} frames/s "
+          f"({stats['detect_workers']} detection processes, {stats['dropped']} frames dropped at capture)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,112 +1,257 @@
-import datetime
+import time
 import cv2
-import torch
-from ultralytics import YOLO
+import numpy as np
 
-from utils.helper import calculate_fps, draw_text, filter_image, draw_datetime
-from utils.config import classes, colors
+try:
+    import torch
+except ImportError:  # Без torch доступний лише шлях з готовою моделлю-заглушкою (бенчмарки)
+    torch = None
+
+from modules.cadence import DetectionCadence
+from modules.metrics import metrics
+from modules.model_manager import ModelManager
+from modules.motion import MotionGate
+from modules.preprocessing import FilterChain
+from utils.helper import draw_text, draw_datetime, build_class_mask, boxes_to_detections, letterbox, \
+    unletterbox_boxes, boxes_intersect, tile_grid, nms_detections, DETECTION_DTYPE
+from utils.config import classes, colors, tiling_params
 
 
 class ObjectDetectionAndTracking:
     def __init__(self, model_path, confidence_threshold=0.7, allowed_classes=classes, logger=None, tracker=None,
-                 video_recorder=None, output_dir=None):
+                 video_recorder=None, output_dir=None, input_size=640, model=None):
         self.allowed_classes = allowed_classes
+        self.input_size = input_size
         self.output_dir = output_dir
         self.logger = logger
         self.confidence_threshold = confidence_threshold
         self.RED = colors.get('RED')
         self.GREEN = colors.get('GREEN')
 
-        # Ініціалізація пристрою для обчислень
-        self.device = torch.device("mps" if torch.backends.mps.is_available() else "cpu")
-        print(f"Using device: {self.device}")
-
         # Ініціалізація відеозахоплення
         self.video_recorder = video_recorder
-        self.video_cap = self.video_recorder.video_cap
 
-        # Завантаження моделі YOLO
-        self.model = YOLO(model_path)
-        self.model.to(self.device)
+        # Завантаження моделі YOLO (кеш ваг, оптимізований експорт, прогрів) та пристрій обчислень;
+        # готова модель (наприклад, заглушка в бенчмарках) використовується як є на CPU
+        self.model_manager = None
+        if model is None:
+            self.model_manager = ModelManager(model_path, input_size=self.input_size)
+            model = self.model_manager.load()
+            self.device = self.model_manager.device
+            self.max_batch = self.model_manager.max_batch
+        else:
+            self.device = torch.device("cpu") if torch is not None else "cpu"
+            self.max_batch = None
+        self.model = model
+
+        # Маска дозволених класів та їх ідентифікатори для фільтрації всередині моделі
+        self.class_mask = build_class_mask(self.model.names, self.allowed_classes)
+        self.class_ids = np.flatnonzero(self.class_mask).tolist()
+
+        # Ланцюжок фільтрів зображення з utils.config.preprocessing_params
+        self.filter_chain = FilterChain()
+
+        # Попередньо виділений буфер входу моделі (пакет x розмір x розмір x 3)
+        self._input_buffer = None
 
         # Ініціалізація трекера DeepSort
         self.tracker = tracker
 
-        # Час про скріншот
-        self.screenshot_notification_time = None
-
-        # Ініціалізація FPS
-        self.prev_time = datetime.datetime.now()
-        self.fps = 0.0
-
-    def process_frame(self):
-        """Обробка одного кадру для детекції та трекінгу."""
-        # Фільтрація зображення
-        frame = filter_image(self.video_recorder.read_frame())
-
-        # Додавання часу та дати
-        draw_datetime(frame)
-
-        original_size = frame.shape[1::-1]  # Оригінальні (ширина, висота)
-        frame_resized = cv2.resize(frame, (640, 640))
+        # Номер поточного кадру
+        self.frame_index = 0
 
-        # Підготовка кадру для моделі
-        frame_tensor = torch.from_numpy(frame_resized).permute(2, 0, 1).unsqueeze(0).float().to(self.device)
+        # Адаптивна частота детекції (між детекціями — лише прогноз трекера)
+        self.cadence = DetectionCadence()
 
-        with torch.no_grad():
-            detections = self.model(frame_tensor)[0]
+        # Пропуск детекції без руху, детекція лише в ROI/областях руху (utils.config.motion_params)
+        self.motion_gate = MotionGate()
 
-        if detections is None or len(detections.boxes) == 0:
-            return frame  # Повернення без змін, якщо немає детекцій
+        # Тайлова детекція в повній роздільності (utils.config.tiling_params)
+        self.tiling_params = dict(tiling_params)
 
-        results = self._extract_results(detections)
+        # Трансляція результатів (modules/stream_server.StreamServer), якщо увімкнено
+        self.stream_server = None
 
-        # Оновлення трекера
-        tracks = self.tracker.update_tracks(results, frame=frame_resized, )
-
-        # Логування інформації
-        self._log_detections(tracks)
-
-        # Масштабування до оригінальних розмірів
-        frame_output = cv2.resize(frame_resized, original_size)
-
-        # Додавання FPS, статусу та сповіщень
-        self.fps = calculate_fps(self.prev_time)
-        self.prev_time = datetime.datetime.now()
-        draw_text(frame_output, f"FPS: {self.fps:.2f}", (10, 30), (0, 255, 0))
-        self._draw_status(frame_output)
-
-        return frame_output
-
-    def _extract_results(self, detections):
-        """Обробка результатів детекції YOLO."""
-        results = []
-        for det in detections.boxes.data.cpu().numpy():
-            confidence = det[4]
-
-            if confidence < self.confidence_threshold:
-                continue
-            class_id = int(det[5])
-            class_name = self.model.names.get(class_id, "Unknown")
+        # Час про скріншот
+        self.screenshot_notification_time = None
 
-            if class_name not in self.allowed_classes:  # Фільтр класів
-                continue
-            x_min, y_min, x_max, y_max = map(int, det[:4])
-            width, height = x_max - x_min, y_max - y_min
-            results.append([[x_min, y_min, width, height], confidence, class_id])
-        return results
+        # Ініціалізація FPS (EWMA за метриками конвеєра)
+        self.fps = 0.0
 
-    def _log_detections(self, tracks):
+    def process_frame(self, frame):
+        """Обробка одного кадру для детекції та трекінгу."""
+        frame, tracks = self.analyze_frame(frame)
+        return self.annotate_frame(frame, tracks)
+
+    def analyze_frame(self, frame):
+        """Детекція та трекінг без оверлеїв. Повертає (кадр, треки)."""
+        start = time.perf_counter()
+        self.frame_index += 1
+        frame_index = self.frame_index
+
+        # Фільтрація зображення (на повному кадрі, якщо не задано інше)
+        if not self.filter_chain.at_model_resolution:
+            with metrics.timer("filter"):
+                frame = self.filter_chain.apply(frame)
+
+        detected = self.cadence.should_detect()
+        regions = None
+        active_areas = self.motion_gate.roi_boxes(frame.shape) or None
+        if detected and self.motion_gate.enabled:
+            with metrics.timer("motion"):
+                motion_boxes = self.motion_gate.update(frame)
+            track_boxes = self.tracker.active_boxes()
+            if not motion_boxes and not track_boxes:
+                # Нічого не рухається і немає кого супроводжувати — YOLO не запускається
+                detected = False
+                metrics.increment("motion_skipped_frames")
+            else:
+                regions = self.motion_gate.regions(frame.shape, motion_boxes, track_boxes)
+                active_areas = motion_boxes + [tuple(box) for box in track_boxes]
+
+        if detected:
+            if self.tiling_params['enabled']:
+                results = self.detect_tiled(frame, active_areas)
+            elif regions is None:
+                results = self.detect([frame])[0]
+            else:
+                results = self.detect_regions(frame, regions)
+
+            # Оновлення трекера в оригінальній роздільній здатності
+            tracks = self.tracker.update_tracks(results, frame=frame)
+
+            # Логування інформації
+            self._log_detections(tracks, frame_index)
+        else:
+            # Кадр без детекції: лише прогноз фільтра Калмана
+            tracks = self.tracker.predict_tracks(frame)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.cadence.record(detected, elapsed_ms)
+        metrics.observe("analyze", elapsed_ms)
+        metrics.increment("detection_frames" if detected else "predict_frames")
+        return frame, tracks
+
+    def detect(self, frames):
+        """Пакетна детекція одним проходом моделі. Повертає результати в координатах оригінальних кадрів."""
+        if self.max_batch and len(frames) > self.max_batch:
+            # Експорт зі статичним розміром пакета (TorchScript, статичний ONNX/OpenVINO) — прохід на частину
+            return [output for start in range(0, len(frames), self.max_batch)
+                    for output in self.detect(frames[start:start + self.max_batch])]
+        with metrics.timer("preprocess"):
+            batch_tensor, transforms = self._preprocess(frames)
+
+        with metrics.timer("infer"), torch.no_grad():
+            batch_detections = self.model(batch_tensor, classes=self.class_ids, conf=self.confidence_threshold,
+                                          verbose=False)
+
+        outputs = []
+        with metrics.timer("postprocess"):
+            for frame, transform, detections in zip(frames, transforms, batch_detections):
+                if detections is None or len(detections.boxes) == 0:
+                    outputs.append(np.empty(0, dtype=DETECTION_DTYPE))
+                else:
+                    outputs.append(self._extract_results(detections, transform, frame.shape))
+        return outputs
+
+    def detect_regions(self, frame, regions):
+        """Детекція лише в областях [x1, y1, x2, y2] кадру: кропи одним пакетом, результати в координатах кадру."""
+        if not regions:
+            return np.empty(0, dtype=DETECTION_DTYPE)
+        crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in regions]
+        outputs = self.detect(crops)
+        for (x1, y1, _, _), detections in zip(regions, outputs):
+            detections['ltwh'][:, :2] += (x1, y1)
+        metrics.increment("region_detections", len(regions))
+        return np.concatenate(outputs)
+
+    def detect_tiled(self, frame, active_areas=None):
+        """Детекція на тайлах повної роздільності (та грубому проході по всьому кадру) з NMS у координатах кадру.
+
+        active_areas — рамки руху/ROI/треків; тайли поза ними пропускаються.
+        """
+        params = self.tiling_params
+        height, width = frame.shape[:2]
+        tiles = tile_grid(frame.shape, params['tile_size'], params['overlap'])
+        total_tiles = len(tiles)
+        if active_areas is not None:
+            tiles = [tile for tile in tiles if boxes_intersect(tile, active_areas)]
+        metrics.increment("tiles_skipped", total_tiles - len(tiles))
+
+        regions = list(tiles)
+        if params['hybrid'] and (0, 0, width, height) not in regions:
+            regions.insert(0, (0, 0, width, height))
+
+        batch_size = max(1, params['max_batch'])
+        outputs = [self.detect_regions(frame, regions[start:start + batch_size])
+                   for start in range(0, len(regions), batch_size)]
+        results = np.concatenate(outputs) if outputs else np.empty(0, dtype=DETECTION_DTYPE)
+        with metrics.timer("tile_nms"):
+            return nms_detections(results, params['nms_iou'])
+
+    def _preprocess(self, frames):
+        """Letterbox у попередньо виділений буфер та одне перетворення у вхідний тензор моделі."""
+        buffer, transforms = self._letterbox_batch(frames)
+
+        # BGR uint8 NHWC -> RGB float NCHW у діапазоні [0, 1]
+        batch_tensor = torch.from_numpy(buffer).to(self.device).permute(0, 3, 1, 2).flip(1).float().div_(255)
+        return batch_tensor, transforms
+
+    def _letterbox_batch(self, frames):
+        """Letterbox кадрів у попередньо виділений буфер (пакет x розмір x розмір x 3) та фільтри на ньому."""
+        if self._input_buffer is None or len(self._input_buffer) < len(frames):
+            self._input_buffer = np.empty((len(frames), self.input_size, self.input_size, 3), dtype=np.uint8)
+        buffer = self._input_buffer[:len(frames)]
+        transforms = [letterbox(frame, slot) for frame, slot in zip(frames, buffer)]
+        if self.filter_chain.at_model_resolution:
+            for slot in buffer:
+                self.filter_chain.apply(slot)
+        return buffer, transforms
+
+    def annotate_frame(self, frame, tracks, frame_index=None):
+        """Додавання часу, FPS, статусу та передача готового кадру на запис.
+
+        frame_index — номер кадру з analyze_frame; у конвеєрі передається разом з кадром,
+        бо self.frame_index тим часом уже збільшує потік детекції.
+        """
+        if frame_index is None:
+            frame_index = self.frame_index
+        with metrics.timer("draw"):
+            draw_datetime(frame)
+
+            self.fps = metrics.tick("output")
+            draw_text(frame, f"FPS: {self.fps:.2f}", (10, 30), (0, 255, 0))
+
+            if self.video_recorder is not None:
+                self._draw_status(frame)
+                self.video_recorder.draw_recording_timer(frame)
+
+        if self.video_recorder is not None:
+            self.video_recorder.write_frame(frame, tracks, self.model.names)
+        if self.stream_server is not None:
+            self.stream_server.publish(frame, tracks, self.model.names, frame_index)
+
+        return frame
+
+    def _extract_results(self, detections, transform, frame_shape):
+        """Обробка результатів детекції YOLO у масив DETECTION_DTYPE в координатах оригінального кадру."""
+        boxes = unletterbox_boxes(detections.boxes.data.cpu().numpy(), *transform, frame_shape)
+        return boxes_to_detections(boxes, self.confidence_threshold, self.class_mask)
+
+    def _log_detections(self, tracks, frame_index):
         """Логування виявлених об'єктів через Logger."""
-        detected_objects = [f"Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}, "
-                            f"Class: {self.model.names[track.det_class]}, ID: {track.track_id}"
-                            for track in tracks if track.is_confirmed()]
-        self.logger.log_detections(detected_objects)
+        if self.logger is None:
+            return
+        self.logger.log_tracks(tracks, self.model.names, frame_index)
 
     def _draw_status(self, frame):
         """Малювання статусу запису."""
-        status_text = f"Recording: {'ON' if self.video_recorder.is_recording else 'OFF'}"
-        status_color = self.GREEN if self.video_recorder.is_recording else self.RED
+        if self.video_recorder.is_recording:
+            status_text, status_color = "Recording: ON", self.GREEN
+        elif self.video_recorder.is_event_recording:
+            status_text, status_color = "Recording: EVENT", self.GREEN
+        else:
+            status_text, status_color = "Recording: OFF", self.RED
         draw_text(frame, status_text, (10, 60), status_color)
 
     def toggle_recording(self):
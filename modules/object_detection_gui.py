@@ -1,15 +1,27 @@
-from PyQt5.QtWidgets import QMainWindow, QLabel, QPushButton, QVBoxLayout, QWidget, QHBoxLayout, QMessageBox, \
-    QFormLayout, QGroupBox, QSpinBox, QSlider
+from PyQt5.QtWidgets import QApplication, QMainWindow, QLabel, QPushButton, QVBoxLayout, QWidget, QHBoxLayout, \
+    QMessageBox, QFormLayout, QGroupBox, QSpinBox, QSlider, QSizePolicy
 from PyQt5.QtGui import QImage, QPixmap
-from PyQt5.QtCore import QTimer, Qt
-import cv2
+from PyQt5.QtCore import Qt, QEvent, pyqtSignal
+
+from modules.display import DisplayAdapter
+from modules.metrics import metrics
+from modules.pipeline import FramePipeline
+from utils.config import display_params
+
+# Format_BGR888 (Qt >= 5.14) дозволяє показувати кадри OpenCV без перетворення кольорів
+BGR888 = getattr(QImage, "Format_BGR888", None)
 
 
 class ObjectDetectionGUI(QMainWindow):
+    # Готові кадри (оригінал, зображення для показу) надходять із потоку рендерингу через сигнал Qt
+    frame_ready = pyqtSignal(object, object)
+    pipeline_finished = pyqtSignal()
+
     def __init__(self, app):
         super().__init__()
         self.app = app
         self.running = True
+        self.current_frame = None
 
         # Налаштування вікна
         self.setWindowTitle("Object Detection and Tracking")
@@ -24,6 +36,15 @@ class ObjectDetectionGUI(QMainWindow):
         self.video_label.setStyleSheet("background-color: black;")
         self.video_label.setAlignment(Qt.AlignCenter)
         self.video_label.setMinimumSize(1024, 576)
+        # Розмір віджета не залежить від розміру зображення
+        self.video_label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+
+        # Масштабування в потоці рендерингу, показ не частіше за частоту монітора
+        screen = QApplication.primaryScreen()
+        max_fps = display_params['max_fps'] or (screen.refreshRate() if screen else 60)
+        self.display = DisplayAdapter(BGR888 is not None, max_fps)
+        self.image_format = BGR888 if BGR888 is not None else QImage.Format_RGB888
+        self.video_label.installEventFilter(self)
 
         # Кнопки
         self.start_button = QPushButton("Start Recording")
@@ -71,39 +92,57 @@ class ObjectDetectionGUI(QMainWindow):
         layout.addLayout(buttons_layout)
         layout.addWidget(parameter_group)
 
-        # Таймер для оновлення відео
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_video)
-        self.timer.start(30)
-
-    def update_video(self):
-        """Оновлення відеопотоку."""
-        if not self.running:
-            return
-
-        ret, frame = self.app.video_cap.read()
-        if ret:
-            frame = self.app.process_frame()
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-            # Перетворення у QImage
-            height, width, channel = frame.shape
-            bytes_per_line = channel * width
-            qimg = QImage(frame.data, width, height, bytes_per_line, QImage.Format_RGB888)
-
-            # Відображення на QLabel
-            pixmap = QPixmap.fromImage(qimg)
-            self.video_label.setPixmap(pixmap.scaled(
-                self.video_label.width(),
-                self.video_label.height(),
-                Qt.KeepAspectRatio
-            ))
+        # Конвеєр обробки відео у фонових потоках
+        self.frame_ready.connect(self.update_video)
+        self.pipeline_finished.connect(self.on_pipeline_finished)
+        self.pipeline = FramePipeline(self.app, self.on_frame, self.pipeline_finished.emit)
+        self.pipeline.start()
+
+    def on_frame(self, frame):
+        """Потік рендерингу: підготовка зображення для показу та передача в GUI."""
+        image = self.display.prepare(frame)
+        if image is not None:
+            self.frame_ready.emit(frame, image)
+
+    def update_video(self, frame, image):
+        """Відображення готового кадру з конвеєра."""
+        try:
+            if not self.running:
+                return
+
+            self.current_frame = frame
+            with metrics.timer("display"):
+                # Зображення вже має розмір віджета; QPixmap.fromImage копіює буфер
+                height, width = image.shape[:2]
+                qimg = QImage(image.data, width, height, image.strides[0], self.image_format)
+                pixmap = QPixmap.fromImage(qimg)
+                pixmap.setDevicePixelRatio(self.video_label.devicePixelRatioF())
+                self.video_label.setPixmap(pixmap)
+            metrics.tick("display")
+        finally:
+            self.display.release()
+
+    def eventFilter(self, watched, event):
+        """Передача нового розміру відеовіджета потоку рендерингу."""
+        if watched is self.video_label and event.type() == QEvent.Resize:
+            ratio = self.video_label.devicePixelRatioF()
+            self.display.set_target_size(event.size().width() * ratio, event.size().height() * ratio)
+        return super().eventFilter(watched, event)
+
+    def on_pipeline_finished(self):
+        """Завершення відеопотоку."""
+        if self.running:
+            self.statusBar().showMessage("Video stream finished.")
 
     def start_recording(self):
         if self.app.video_recorder.is_recording:
             QMessageBox.warning(self, "Recording", "Recording is already in progress!")
         else:
-            self.app.toggle_recording()
+            try:
+                self.app.toggle_recording()
+            except IOError as e:
+                QMessageBox.critical(self, "Recording", f"Failed to start recording: {e}")
+                return
             QMessageBox.information(self, "Recording", "Recording started.")
 
     def stop_recording(self):
@@ -114,9 +153,8 @@ class ObjectDetectionGUI(QMainWindow):
             QMessageBox.information(self, "Recording", "Recording stopped.")
 
     def take_screenshot(self):
-        ret, frame = self.app.video_cap.read()
-        if ret:
-            self.app.save_screenshot(frame)
+        if self.current_frame is not None:
+            self.app.save_screenshot(self.current_frame)
             QMessageBox.information(self, "Screenshot", "Screenshot saved successfully!")
         else:
             QMessageBox.warning(self, "Screenshot", "Failed to capture screenshot.")
@@ -129,7 +167,13 @@ class ObjectDetectionGUI(QMainWindow):
 
     def quit_application(self):
         self.running = False
-        self.app.video_cap.release()
-        if self.app.video_recorder.writer is not None:
-            self.app.writer.release()
+        self.pipeline.stop()
+        self.app.video_recorder.release()
         self.close()
+
+    def closeEvent(self, event):
+        if self.running:
+            self.running = False
+            self.pipeline.stop()
+            self.app.video_recorder.release()
+        super().closeEvent(event)
@@ -1,39 +1,120 @@
 import cv2
-from deep_sort_realtime.deepsort_tracker import DeepSort
+import numpy as np
+from modules.metrics import metrics
+from modules.trackers import create_tracker
 from utils.helper import draw_text
-from utils.config import deep_sort_params, classes, colors
+from utils.config import deep_sort_params, trajectory_params, classes, colors
+
+
+class _Trajectory:
+    __slots__ = ("points", "head", "count", "last_seen")
+
+    def __init__(self, capacity):
+        self.points = np.empty((capacity, 2), dtype=np.int32)
+        self.head = 0  # Індекс наступного запису
+        self.count = 0
+        self.last_seen = 0
+
+
+class TrajectoryStore:
+    """Траєкторії треків у кільцевих буферах NumPy фіксованої ємності."""
+
+    def __init__(self, capacity=None, max_age=None):
+        self.capacity = capacity or trajectory_params['capacity']
+        self.max_age = max_age if max_age is not None else deep_sort_params['max_age']
+        self.frame_index = 0
+        self._trajectories = {}
+
+    def __contains__(self, track_id):
+        return track_id in self._trajectories
+
+    def __len__(self):
+        return len(self._trajectories)
+
+    def update(self, tracks):
+        """Додає центри підтверджених треків і видаляє зниклі треки."""
+        self.frame_index += 1
+        alive = set()
+        for track in tracks:
+            if track.is_deleted():
+                continue
+            alive.add(track.track_id)
+            if not track.is_confirmed():
+                continue
+            x_min, y_min, x_max, y_max = track.to_tlbr()
+            self.add(track.track_id, (x_min + x_max) / 2, (y_min + y_max) / 2)
+        self.evict(alive)
+
+    def add(self, track_id, x, y):
+        trajectory = self._trajectories.get(track_id)
+        if trajectory is None:
+            trajectory = self._trajectories[track_id] = _Trajectory(self.capacity)
+        trajectory.points[trajectory.head] = (x, y)
+        trajectory.head = (trajectory.head + 1) % self.capacity
+        trajectory.count = min(trajectory.count + 1, self.capacity)
+        trajectory.last_seen = self.frame_index
+
+    def evict(self, alive=None):
+        """Видалення треків, яких немає у трекері або які не оновлювались довше за max_age кадрів."""
+        for track_id in list(self._trajectories):
+            trajectory = self._trajectories[track_id]
+            if (alive is not None and track_id not in alive) or \
+                    self.frame_index - trajectory.last_seen > self.max_age:
+                del self._trajectories[track_id]
+
+    def points(self, track_id):
+        """Точки траєкторії у хронологічному порядку, масив (N, 2)."""
+        trajectory = self._trajectories.get(track_id)
+        if trajectory is None or trajectory.count == 0:
+            return np.empty((0, 2), dtype=np.int32)
+        if trajectory.count < self.capacity:
+            return trajectory.points[:trajectory.count]
+        return np.concatenate((trajectory.points[trajectory.head:], trajectory.points[:trajectory.head]))
+
+    def stats(self):
+        """Розмір сховища: кількість треків, точок і байтів."""
+        return {'tracks': len(self._trajectories),
+                'points': sum(trajectory.count for trajectory in self._trajectories.values()),
+                'capacity': self.capacity,
+                'bytes': sum(trajectory.points.nbytes for trajectory in self._trajectories.values())}
 
 
 class ObjectTracking:
-    def __init__(self):
-        self.tracker = DeepSort(**deep_sort_params)
-        self.trajectories = {}
+    def __init__(self, backend=None):
+        # Трекер обирається в utils.config.tracker_params['backend']
+        self.tracker = create_tracker(backend)
+        self.trajectories = TrajectoryStore()
         self.GREEN = colors.get('GREEN')  # Колір для "person"
         self.BLUE = colors.get('BLUE')  # Колір для інших об'єктів
         self.WHITE = colors.get('WHITE')
         self.RED = colors.get('RED')
         self.classes = classes
 
-    def update_tracks(self, results, frame):
-        """Оновлення треків на основі результатів детекції."""
-        tracks = self.tracker.update_tracks(results, frame=frame)
-        self._update_trajectories(tracks)  # Оновлення траєкторій
-        self._draw_tracks(frame, tracks)  # Виклик малювання треків
+    def update_tracks(self, results, frame, embeds=None):
+        """Оновлення треків на основі результатів детекції (embeds — готові ембединги для DeepSort)."""
+        with metrics.timer("track"):
+            tracks = self.tracker.update(results, frame, embeds)
+            self._update_trajectories(tracks)  # Оновлення траєкторій
+        with metrics.timer("draw_tracks"):
+            self._draw_tracks(frame, tracks)  # Виклик малювання треків
+        return tracks
+
+    def predict_tracks(self, frame):
+        """Оновлення треків лише за моделлю руху, без детекцій."""
+        with metrics.timer("predict"):
+            tracks = self.tracker.predict()
+            self._update_trajectories(tracks)
+        with metrics.timer("draw_tracks"):
+            self._draw_tracks(frame, tracks)
         return tracks
 
+    def active_boxes(self):
+        """Рамки [x1, y1, x2, y2] підтверджених треків."""
+        return [track.to_ltrb() for track in self.tracker.tracks if track.is_confirmed()]
+
     def _update_trajectories(self, tracks):
         """Оновлення траєкторій для активних треків."""
-        for track in tracks:
-            if not track.is_confirmed():
-                continue
-            for _ in range(100):
-                track_id = track.track_id
-                center_x = int((track.to_tlbr()[0] + track.to_tlbr()[2]) / 2)
-                center_y = int((track.to_tlbr()[1] + track.to_tlbr()[3]) / 2)
-
-                if track_id not in self.trajectories:
-                    self.trajectories[track_id] = []
-                self.trajectories[track_id].append((center_x, center_y))
+        self.trajectories.update(tracks)
 
     def _draw_tracks(self, frame, tracks):
         """Малювання треків на кадрі."""
@@ -49,8 +130,7 @@ class ObjectTracking:
             draw_text(frame, text, (x_min, y_min - 10), self.WHITE)
 
             if class_id == 0:
-                # Малювання траєкторій
-                if track_id in self.trajectories:
-                    points = self.trajectories[track_id]
-                    for i in range(1, len(points)):
-                        cv2.line(frame, points[i - 1], points[i], self.RED, 2)
+                # Малювання траєкторії однією ламаною
+                points = self.trajectories.points(track_id)
+                if len(points) > 1:
+                    cv2.polylines(frame, [points.reshape(-1, 1, 2)], False, self.RED, 2)
@@ -0,0 +1,149 @@
+import queue
+import threading
+
+from modules.metrics import metrics
+from utils.helper import is_live_source
+from utils.config import pipeline_params
+
+
+class FrameQueue:
+    """Обмежена черга між етапами конвеєра з політикою скидання кадрів."""
+
+    def __init__(self, maxsize, drop_policy="latest"):
+        if drop_policy not in ("latest", "lossless"):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.drop_policy = drop_policy
+        self.dropped = 0
+
+    def put(self, item, stop_event):
+        """Додає елемент; для 'latest' витісняє найстаріший кадр, для 'lossless' чекає на місце."""
+        while not stop_event.is_set():
+            try:
+                if self.drop_policy == "latest":
+                    self.queue.put_nowait(item)
+                else:
+                    self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if self.drop_policy == "latest":
+                    try:
+                        self.queue.get_nowait()
+                        self.dropped += 1
+                        metrics.increment("pipeline_dropped_frames")
+                    except queue.Empty:
+                        pass
+        return False
+
+    def get(self, stop_event, timeout=0.1):
+        """Повертає наступний елемент або None після зупинки конвеєра."""
+        while not stop_event.is_set():
+            try:
+                return self.queue.get(timeout=timeout)
+            except queue.Empty:
+                continue
+        return None
+
+    def get_nowait(self):
+        """Повертає наступний елемент або None, якщо черга порожня."""
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def qsize(self):
+        return self.queue.qsize()
+
+
+class FramePipeline:
+    """Конвеєр: потік захоплення -> потік детекції/трекінгу -> потік рендерингу."""
+
+    def __init__(self, app, on_frame, on_finished=None, queue_size=None, drop_policy=None):
+        self.app = app
+        self.on_frame = on_frame
+        self.on_finished = on_finished
+
+        queue_size = queue_size or pipeline_params['queue_size']
+        drop_policy = drop_policy or pipeline_params['drop_policy']
+        if drop_policy is None:
+            # Живі потоки — лише найсвіжіший кадр, файли — без втрат
+            drop_policy = "latest" if is_live_source(app.video_recorder.video_source) else "lossless"
+        self.drop_policy = drop_policy
+
+        self.capture_queue = FrameQueue(queue_size, drop_policy)
+        self.render_queue = FrameQueue(queue_size, drop_policy)
+        self.stop_event = threading.Event()
+        self.threads = []
+
+        # Глибина черг зчитується під час експорту метрик
+        metrics.set_gauge("capture_queue_depth", self.capture_queue.qsize)
+        metrics.set_gauge("render_queue_depth", self.render_queue.qsize)
+
+    def start(self):
+        """Запуск усіх етапів конвеєра."""
+        self.stop_event.clear()
+        stages = (("capture", self._capture_loop), ("inference", self._inference_loop), ("render", self._render_loop))
+        self.threads = [threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+                        for name, target in stages]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self, timeout=2.0):
+        """Зупинка конвеєра та очікування завершення потоків."""
+        self.stop_event.set()
+        for thread in self.threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        self.threads = []
+
+    def is_running(self):
+        return any(thread.is_alive() for thread in self.threads)
+
+    @property
+    def dropped_frames(self):
+        return self.capture_queue.dropped + self.render_queue.dropped
+
+    def _capture_loop(self):
+        """Етап захоплення: один декодований кадр на ітерацію."""
+        try:
+            while not self.stop_event.is_set():
+                ret, frame = self.app.video_recorder.read_frame()
+                if not ret:
+                    print("Не вдалося отримати кадр. Завершення захоплення.")
+                    break
+                self.capture_queue.put(frame, self.stop_event)
+        except Exception as e:
+            print(f"Capture error: {e}")
+        finally:
+            # Сигнал кінця потоку для наступних етапів
+            self.capture_queue.put(None, self.stop_event)
+
+    def _inference_loop(self):
+        """Етап детекції та трекінгу."""
+        try:
+            while True:
+                frame = self.capture_queue.get(self.stop_event)
+                if frame is None:
+                    break
+                frame, tracks = self.app.analyze_frame(frame)
+                # Номер кадру передається разом з ним: поки кадр у черзі, frame_index уже інший
+                self.render_queue.put((frame, tracks, self.app.frame_index), self.stop_event)
+        except Exception as e:
+            print(f"Inference error: {e}")
+        finally:
+            self.render_queue.put(None, self.stop_event)
+
+    def _render_loop(self):
+        """Етап рендерингу: накладання оверлеїв та передача готового кадру."""
+        try:
+            while True:
+                item = self.render_queue.get(self.stop_event)
+                if item is None:
+                    break
+                frame, tracks, frame_index = item
+                self.on_frame(self.app.annotate_frame(frame, tracks, frame_index))
+        except Exception as e:
+            print(f"Render error: {e}")
+        finally:
+            if self.on_finished is not None:
+                self.on_finished()
@@ -0,0 +1,102 @@
+import time
+
+import cv2
+import numpy as np
+
+from utils.config import preprocessing_params
+
+
+class BlurFilter:
+    """Зменшення шуму розмиттям Гаусса."""
+    name = "blur"
+
+    def __init__(self, params):
+        self.kernel = tuple(params['blur_kernel'])
+
+    def __call__(self, src, dst):
+        cv2.GaussianBlur(src, self.kernel, 0, dst=dst)
+
+
+class NormalizeFilter:
+    """Корекція освітлення розтягуванням гістограми (NORM_MINMAX)."""
+    name = "normalize"
+
+    def __init__(self, params):
+        pass
+
+    def __call__(self, src, dst):
+        cv2.normalize(src, dst, alpha=0, beta=255, norm_type=cv2.NORM_MINMAX)
+
+
+class ClaheFilter:
+    """Локальне вирівнювання контрасту (CLAHE) за каналом яскравості L простору LAB."""
+    name = "clahe"
+
+    def __init__(self, params):
+        self.clahe = cv2.createCLAHE(clipLimit=params['clahe_clip_limit'],
+                                     tileGridSize=tuple(params['clahe_tile_grid']))
+        self._lab = None
+        self._lightness = None
+
+    def __call__(self, src, dst):
+        if self._lab is None or self._lab.shape != src.shape:
+            self._lab = np.empty_like(src)
+            self._lightness = np.empty(src.shape[:2], dtype=src.dtype)
+        cv2.cvtColor(src, cv2.COLOR_BGR2LAB, dst=self._lab)
+        cv2.extractChannel(self._lab, 0, dst=self._lightness)
+        self.clahe.apply(self._lightness, dst=self._lightness)
+        cv2.insertChannel(self._lightness, self._lab, 0)
+        cv2.cvtColor(self._lab, cv2.COLOR_LAB2BGR, dst=dst)
+
+
+FILTERS = {
+    BlurFilter.name: BlurFilter,
+    NormalizeFilter.name: NormalizeFilter,
+    ClaheFilter.name: ClaheFilter,
+}
+
+
+class FilterChain:
+    """Налаштовуваний ланцюжок фільтрів з попередньо виділеними буферами та таймінгом кожного етапу."""
+
+    def __init__(self, params=None, smoothing=0.9):
+        params = {**preprocessing_params, **(params or {})}
+        unknown = [name for name in params['filters'] if name not in FILTERS]
+        if unknown:
+            raise ValueError(f"Unknown image filters: {unknown}")
+
+        self.filters = [FILTERS[name](params) for name in params['filters']]
+        self.at_model_resolution = params['at_model_resolution']
+        self.smoothing = smoothing
+        self.timings = {image_filter.name: 0.0 for image_filter in self.filters}
+        self._scratch = None
+
+    def __bool__(self):
+        return bool(self.filters)
+
+    def apply(self, frame):
+        """Застосовує фільтри на місці: результат завжди записується назад у frame."""
+        if not self.filters:
+            return frame
+        if self._scratch is None or self._scratch.shape != frame.shape:
+            self._scratch = np.empty_like(frame)
+
+        # Чергування буферів так, щоб останній етап писав у frame
+        count = len(self.filters)
+        src = frame
+        for index, image_filter in enumerate(self.filters):
+            dst = frame if (count - 1 - index) % 2 == 0 else self._scratch
+            start = time.perf_counter()
+            image_filter(src, dst)
+            self._record(image_filter.name, (time.perf_counter() - start) * 1000)
+            src = dst
+        return frame
+
+    def _record(self, name, elapsed_ms):
+        previous = self.timings[name]
+        self.timings[name] = elapsed_ms if previous == 0.0 else \
+            self.smoothing * previous + (1 - self.smoothing) * elapsed_ms
+
+    def stats(self):
+        """Середній час кожного етапу, мс (EWMA)."""
+        return dict(self.timings)
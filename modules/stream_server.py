@@ -0,0 +1,432 @@
+import asyncio
+import base64
+import hashlib
+import json
+import sys
+import threading
+import time
+
+import cv2
+
+from modules.metrics import metrics, LatencyWindow
+from utils.config import stream_server_params
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+VIDEO_CLIENTS = ("mjpeg",)
+EVENT_CLIENTS = ("sse", "websocket")
+
+INDEX_HTML = b"""<!doctype html>
+<html><head><meta charset="utf-8"><title>Object Detection and Tracking</title></head>
+<body style="margin:0;background:#111;color:#ddd;font-family:monospace">
+<img src="/stream.mjpg" style="max-width:100%;display:block;margin:auto">
+<pre id="tracks" style="padding:8px"></pre>
+<script>
+new EventSource("/events").onmessage = e => {
+  const data = JSON.parse(e.data);
+  document.getElementById("tracks").textContent = data.tracks
+    .map(t => `${t.track_id}\\t${t.class}\\t${t.bbox.join(",")}`).join("\\n");
+};
+</script>
+</body></html>
+"""
+
+
+def _websocket_frame(payload, opcode=0x1):
+    """Кадр WebSocket від сервера (без маски)."""
+    header = bytearray([0x80 | opcode])
+    length = len(payload)
+    if length < 126:
+        header.append(length)
+    elif length < 65536:
+        header.append(126)
+        header += length.to_bytes(2, "big")
+    else:
+        header.append(127)
+        header += length.to_bytes(8, "big")
+    return bytes(header) + payload
+
+
+class _Client:
+    """Підключений клієнт з обмеженою чергою: при переповненні відкидається найстаріше повідомлення."""
+
+    def __init__(self, kind, peer, queue_size):
+        self.kind = kind
+        self.peer = peer
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.connected_at = time.monotonic()
+        self.bytes_sent = 0
+        self.messages_sent = 0
+        self.dropped = 0
+
+    def offer(self, item):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            metrics.increment("stream_dropped_messages")
+        self.queue.put_nowait(item)
+
+    def sent(self, size):
+        self.bytes_sent += size
+        self.messages_sent += 1
+        metrics.increment("stream_bytes_sent", size)
+
+    def stats(self, now):
+        elapsed = max(now - self.connected_at, 1e-6)
+        return {'kind': self.kind,
+                'peer': self.peer,
+                'connected_s': elapsed,
+                'messages_sent': self.messages_sent,
+                'bytes_sent': self.bytes_sent,
+                'bandwidth_bps': self.bytes_sent * 8 / elapsed,
+                'dropped': self.dropped}
+
+
+class StreamServer:
+    """Локальний HTTP-сервер на asyncio: анотовані кадри як MJPEG, треки як SSE та WebSocket.
+
+    Кадр кодується в JPEG один раз в окремому потоці й розсилається всім клієнтам. publish() лише
+    запам'ятовує посилання на найсвіжіший кадр, тож конвеєр обробки ніколи не чекає на мережу.
+    """
+
+    def __init__(self, host=None, port=None, params=None):
+        self.params = {**stream_server_params, **(params or {})}
+        self.host = host or self.params['host']
+        self.port = port if port is not None else self.params['port']
+        self.interval = 1.0 / self.params['max_fps'] if self.params['max_fps'] else 0.0
+
+        self.encode = LatencyWindow()
+        self.encoded_frames = 0
+        self.total_bytes = 0
+        self.started_at = None
+
+        self._clients = set()
+        self._video_clients = 0
+        self._event_clients = 0
+        self._last_jpeg = None
+        self._latest_frame = None
+        self._lock = threading.Lock()
+        self._frame_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._started = threading.Event()
+        self._startup_error = None
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+        self._loop_thread = threading.Thread(target=self._run_loop, name="stream-server", daemon=True)
+        self._encode_thread = threading.Thread(target=self._encode_loop, name="stream-encoder", daemon=True)
+
+    def start(self):
+        self._loop_thread.start()
+        self._started.wait(5.0)
+        if self._startup_error is not None:
+            raise RuntimeError(f"Error: Cannot start stream server: {self._startup_error}")
+        self._encode_thread.start()
+        self.started_at = time.monotonic()
+        metrics.set_gauge("stream_clients", lambda: len(self._clients))
+        host, port = self._server.sockets[0].getsockname()[:2]
+        print(f"Stream available at http://{host}:{port}/")
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        self._frame_event.set()
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._shutdown)
+        for thread in (self._encode_thread, self._loop_thread):
+            if thread.is_alive():
+                thread.join(timeout)
+
+    def publish(self, frame, tracks=(), names=None, frame_index=None):
+        """Передача анотованого кадру та треків (викликається з потоку рендерингу, не блокує)."""
+        if self._stop_event.is_set():
+            return
+        if self._video_clients:
+            with self._lock:
+                self._latest_frame = frame
+            self._frame_event.set()
+        if self._event_clients:
+            event = json.dumps({'time': time.time(), 'frame': frame_index,
+                                'tracks': self._track_records(tracks, names or {})}).encode("utf-8")
+            try:
+                self._loop.call_soon_threadsafe(self._broadcast, EVENT_CLIENTS, event)
+            except RuntimeError:
+                pass  # Сервер уже зупинено
+
+    def stats(self):
+        """Статистика: клієнти з трафіком і пропущеними повідомленнями, загальний трафік, час кодування."""
+        now = time.monotonic()
+        uptime = now - self.started_at if self.started_at else 0.0
+        return {'clients': [client.stats(now) for client in list(self._clients)],
+                'total_bytes': self.total_bytes,
+                'total_bandwidth_bps': self.total_bytes * 8 / uptime if uptime else 0.0,
+                'encoded_frames': self.encoded_frames,
+                'encode': self.encode.summary()}
+
+    @staticmethod
+    def _track_records(tracks, names):
+        records = []
+        for track in tracks:
+            if not track.is_confirmed():
+                continue
+            confidence = getattr(track, "det_conf", None)
+            records.append({'track_id': track.track_id,
+                            'class': names.get(track.det_class, "Unknown"),
+                            'bbox': [int(value) for value in track.to_ltrb()],
+                            'confidence': None if confidence is None else round(float(confidence), 3)})
+        return records
+
+    def _encode_loop(self):
+        """Кодування найсвіжішого кадру не частіше за max_fps і лише за наявності клієнтів MJPEG."""
+        quality = [cv2.IMWRITE_JPEG_QUALITY, self.params['jpeg_quality']]
+        last_encoded = 0.0
+        while not self._stop_event.is_set():
+            if not self._frame_event.wait(0.5):
+                continue
+            wait = self.interval - (time.monotonic() - last_encoded)
+            if wait > 0 and self._stop_event.wait(wait):
+                break
+            self._frame_event.clear()
+            with self._lock:
+                frame, self._latest_frame = self._latest_frame, None
+            if frame is None or not self._video_clients:
+                continue
+
+            start = time.perf_counter()
+            ok, buffer = cv2.imencode(".jpg", frame, quality)
+            if not ok:
+                continue
+            self.encode.observe((time.perf_counter() - start) * 1000)
+            self.encoded_frames += 1
+            last_encoded = time.monotonic()
+            self._loop.call_soon_threadsafe(self._broadcast, VIDEO_CLIENTS, buffer.tobytes())
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        except OSError as e:
+            self._startup_error = e
+            self._started.set()
+            return
+        self._started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            self._loop.run_until_complete(self._server.wait_closed())
+            tasks = asyncio.all_tasks(self._loop)
+            for task in tasks:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._loop.close()
+
+    def _shutdown(self):
+        for client in list(self._clients):
+            client.offer(None)
+        self._loop.stop()
+
+    def _broadcast(self, kinds, message):
+        if kinds is VIDEO_CLIENTS:
+            self._last_jpeg = message
+        for client in self._clients:
+            if client.kind in kinds:
+                client.offer(message)
+
+    def _register(self, kind, writer):
+        peer = writer.get_extra_info("peername")
+        client = _Client(kind, f"{peer[0]}:{peer[1]}" if peer else "unknown", self.params['client_queue'])
+        self._clients.add(client)
+        self._update_counts()
+        if kind in VIDEO_CLIENTS and self._last_jpeg is not None:
+            client.offer(self._last_jpeg)
+        return client
+
+    def _unregister(self, client):
+        self._clients.discard(client)
+        self._update_counts()
+
+    def _update_counts(self):
+        self._video_clients = sum(client.kind in VIDEO_CLIENTS for client in self._clients)
+        self._event_clients = sum(client.kind in EVENT_CLIENTS for client in self._clients)
+
+    def _write(self, client, writer, *chunks):
+        size = 0
+        for chunk in chunks:
+            writer.write(chunk)
+            size += len(chunk)
+        client.sent(size)
+        self.total_bytes += size
+
+    async def _handle(self, reader, writer):
+        """Розбір HTTP-запиту та вибір обробника за шляхом."""
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 10)
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await asyncio.wait_for(reader.readline(), 10)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            routes = {'/': self._serve_index,
+                      '/stream.mjpg': self._serve_mjpeg,
+                      '/snapshot.jpg': self._serve_snapshot,
+                      '/events': self._serve_events,
+                      '/ws': self._serve_websocket,
+                      '/stats': self._serve_stats}
+            handler = routes.get(path.split("?", 1)[0])
+            if method != "GET" or handler is None:
+                await self._respond(writer, "404 Not Found", "text/plain", b"Not found")
+            else:
+                await handler(reader, writer, headers)
+        except (ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, content_type, body):
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                     f"Cache-Control: no-cache\r\nConnection: close\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+
+    async def _serve_index(self, reader, writer, headers):
+        await self._respond(writer, "200 OK", "text/html; charset=utf-8", INDEX_HTML)
+
+    async def _serve_stats(self, reader, writer, headers):
+        await self._respond(writer, "200 OK", "application/json", json.dumps(self.stats()).encode("utf-8"))
+
+    async def _serve_snapshot(self, reader, writer, headers):
+        if self._last_jpeg is None:
+            await self._respond(writer, "503 Service Unavailable", "text/plain", b"No frame yet")
+        else:
+            await self._respond(writer, "200 OK", "image/jpeg", self._last_jpeg)
+
+    async def _serve_mjpeg(self, reader, writer, headers):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: multipart/x-mixed-replace; boundary=frame\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        client = self._register("mjpeg", writer)
+        try:
+            while True:
+                jpeg = await client.queue.get()
+                if jpeg is None:
+                    break
+                # Той самий закодований буфер для всіх клієнтів, без копіювання
+                self._write(client, writer, b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n"
+                            % len(jpeg), jpeg, b"\r\n")
+                # Поки клієнт не прийняв дані, нові кадри витісняють старі в його черзі
+                await writer.drain()
+        finally:
+            self._unregister(client)
+
+    async def _serve_events(self, reader, writer, headers):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                     b"Connection: close\r\n\r\n")
+        client = self._register("sse", writer)
+        try:
+            while True:
+                event = await client.queue.get()
+                if event is None:
+                    break
+                self._write(client, writer, b"data: " + event + b"\n\n")
+                await writer.drain()
+        finally:
+            self._unregister(client)
+
+    async def _serve_websocket(self, reader, writer, headers):
+        key = headers.get("sec-websocket-key")
+        if not key or headers.get("upgrade", "").lower() != "websocket":
+            await self._respond(writer, "400 Bad Request", "text/plain", b"WebSocket upgrade expected")
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("latin-1")).digest()).decode("latin-1")
+        writer.write(f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode("latin-1"))
+        client = self._register("websocket", writer)
+        receiver = asyncio.ensure_future(self._websocket_receive(client, reader, writer))
+        try:
+            while True:
+                event = await client.queue.get()
+                if event is None:
+                    break
+                self._write(client, writer, _websocket_frame(event))
+                await writer.drain()
+        finally:
+            receiver.cancel()
+            self._unregister(client)
+
+    @staticmethod
+    async def _websocket_receive(client, reader, writer):
+        """Обробка кадрів від клієнта: відповідь на ping, завершення на close."""
+        try:
+            while True:
+                head = await reader.readexactly(2)
+                opcode, masked, length = head[0] & 0x0F, head[1] & 0x80, head[1] & 0x7F
+                if length == 126:
+                    length = int.from_bytes(await reader.readexactly(2), "big")
+                elif length == 127:
+                    length = int.from_bytes(await reader.readexactly(8), "big")
+                if length > 65536:
+                    break
+                mask = await reader.readexactly(4) if masked else b""
+                payload = await reader.readexactly(length)
+                if masked:
+                    payload = bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+                if opcode == 0x8:
+                    writer.write(_websocket_frame(b"", 0x8))
+                    break
+                if opcode == 0x9:
+                    writer.write(_websocket_frame(payload, 0xA))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            client.offer(None)
+
+
+def main(argv=None):
+    """Обробка джерела без GUI з трансляцією результатів через StreamServer."""
+    import argparse
+    import os
+
+    from modules.logger import Logger
+    from modules.metrics import start_exporters
+    from modules.object_detection import ObjectDetectionAndTracking
+    from modules.object_tracking import ObjectTracking
+    from modules.pipeline import FramePipeline
+    from modules.video_recorder import VideoRecorder
+    from utils.config import detection_params, video_source, classes
+
+    parser = argparse.ArgumentParser(description="Serve annotated video as MJPEG and track events as SSE/WebSocket.")
+    parser.add_argument("--source", default=str(video_source), help="Camera index, stream URL or video file")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    source = int(args.source) if args.source.isdigit() else args.source
+    output_dir = os.path.expanduser("data")
+    logger = Logger(output_dir)
+    video_recorder = VideoRecorder(source, output_dir)
+    detection_app = ObjectDetectionAndTracking(*detection_params, classes, logger, ObjectTracking(), video_recorder,
+                                               output_dir)
+    start_exporters()
+    server = StreamServer(args.host, args.port).start()
+    detection_app.stream_server = server
+
+    finished = threading.Event()
+    pipeline = FramePipeline(detection_app, lambda frame: None, finished.set)
+    pipeline.start()
+    try:
+        while not finished.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipeline.stop()
+        video_recorder.release()
+        server.stop()
+        logger.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+import numpy as np
+
+from modules.embedding import EmbeddingCache, get_embedding_stage
+from utils.helper import ltwh_to_ltrb, iou_matrix
+from utils.config import deep_sort_params, tracker_params, embedding_params
+
+
+def to_deepsort(detections):
+    """Перетворення масиву DETECTION_DTYPE у формат DeepSort ([l, t, w, h], conf, class)."""
+    if isinstance(detections, np.ndarray):
+        return list(zip(detections['ltwh'].tolist(), detections['confidence'].tolist(),
+                        detections['class_id'].tolist()))
+    return detections
+
+
+class DeepSortBackend:
+    """DeepSort з ембедингами зі спільного EmbeddingStage та LRU-кешем для треків, що майже не зрушили.
+
+    refresh_interval = 1 — ембединги для всіх детекцій у кожному кадрі;
+    K > 1 — повний перерахунок кожен K-й кадр, між ними лише для детекцій без збігу в кеші;
+    0 — лише для детекцій без збігу в кеші.
+    """
+
+    def __init__(self, params=None, embedding_stage=None):
+        from deep_sort_realtime.deepsort_tracker import DeepSort
+
+        params = {**embedding_params, **(params or {})}
+        # Власний ембедер не створюється: ембединги завжди передаються в update_tracks
+        self.deepsort = DeepSort(**deep_sort_params, embedder=None)
+        self.embedding_stage = embedding_stage
+        self.cache = EmbeddingCache(params['cache_size'], params['iou_threshold'])
+        self.refresh_interval = params['refresh_interval']
+        self.frame_index = 0
+
+    @property
+    def tracks(self):
+        return self.deepsort.tracker.tracks
+
+    def update(self, detections, frame, embeds=None):
+        raw_detections = to_deepsort(detections)
+        if embeds is None:
+            embeds = self.embed(detections, frame) if raw_detections else []
+        tracks = self.deepsort.update_tracks(raw_detections, embeds=embeds, frame=frame)
+        self.cache.update(tracks)
+        return tracks
+
+    def predict(self):
+        self.deepsort.tracker.predict()
+        return self.tracks
+
+    def embed(self, detections, frame):
+        stage = self.embedding_stage or get_embedding_stage()
+        return stage.compute([(frame, to_deepsort(detections), self.cached_embeddings(detections))])[0]
+
+    def cached_embeddings(self, detections):
+        """Ембединги з кешу для детекцій кадру (None — обчислити); викликається раз на кадр з детекціями."""
+        self.frame_index += 1
+        if self.refresh_interval == 1 or (self.refresh_interval > 1 and self.frame_index % self.refresh_interval == 0):
+            return [None] * len(detections)
+        return self.cache.lookup(ltwh_to_ltrb(detections['ltwh']))
+
+
+class _KalmanBox:
+    """Фільтр Калмана з постійною швидкістю для рамки (cx, cy, w, h)."""
+    _motion = np.eye(8)
+    _motion[:4, 4:] = np.eye(4)
+    _observation = np.eye(4, 8)
+    _std_position = 1.0 / 20
+    _std_velocity = 1.0 / 160
+
+    def __init__(self, box):
+        self.mean = np.r_[box, np.zeros(4)]
+        width, height = box[2], box[3]
+        std = np.array([2 * self._std_position * width, 2 * self._std_position * height,
+                        2 * self._std_position * width, 2 * self._std_position * height,
+                        10 * self._std_velocity * width, 10 * self._std_velocity * height,
+                        10 * self._std_velocity * width, 10 * self._std_velocity * height])
+        self.covariance = np.diag(np.square(std))
+
+    def predict(self):
+        width, height = self.mean[2], self.mean[3]
+        std = np.array([self._std_position * width, self._std_position * height,
+                        self._std_position * width, self._std_position * height,
+                        self._std_velocity * width, self._std_velocity * height,
+                        self._std_velocity * width, self._std_velocity * height])
+        self.mean = self._motion @ self.mean
+        self.covariance = self._motion @ self.covariance @ self._motion.T + np.diag(np.square(std))
+
+    def update(self, box):
+        width, height = self.mean[2], self.mean[3]
+        std = np.array([self._std_position * width, self._std_position * height,
+                        self._std_position * width, self._std_position * height])
+        projected_cov = self._observation @ self.covariance @ self._observation.T + np.diag(np.square(std))
+        gain = self.covariance @ self._observation.T @ np.linalg.inv(projected_cov)
+        self.mean = self.mean + gain @ (box - self._observation @ self.mean)
+        self.covariance = (np.eye(8) - gain @ self._observation) @ self.covariance
+
+
+class SortTrack:
+    """Трек легкого трекера з тим самим інтерфейсом, що й трек DeepSort."""
+    TENTATIVE, CONFIRMED, DELETED = 1, 2, 3
+
+    def __init__(self, track_id, ltwh, confidence, class_id, n_init, max_age):
+        self.track_id = str(track_id)
+        self.det_class = class_id
+        self.det_conf = confidence
+        self.hits = 1
+        self.age = 1
+        self.time_since_update = 0
+        self.n_init = n_init
+        self.max_age = max_age
+        self.state = self.CONFIRMED if n_init <= 1 else self.TENTATIVE
+        self._kalman = _KalmanBox(self._ltwh_to_xywh(ltwh))
+
+    @staticmethod
+    def _ltwh_to_xywh(ltwh):
+        left, top, width, height = (float(value) for value in ltwh)
+        return np.array([left + width / 2, top + height / 2, width, height])
+
+    def predict(self):
+        self._kalman.predict()
+        self.age += 1
+        self.time_since_update += 1
+
+    def update(self, ltwh, confidence, class_id):
+        self._kalman.update(self._ltwh_to_xywh(ltwh))
+        self.det_conf = confidence
+        self.det_class = class_id
+        self.hits += 1
+        self.time_since_update = 0
+        if self.state == self.TENTATIVE and self.hits >= self.n_init:
+            self.state = self.CONFIRMED
+
+    def mark_missed(self):
+        self.det_conf = None
+        if self.state == self.TENTATIVE or self.time_since_update > self.max_age:
+            self.state = self.DELETED
+
+    def is_tentative(self):
+        return self.state == self.TENTATIVE
+
+    def is_confirmed(self):
+        return self.state == self.CONFIRMED
+
+    def is_deleted(self):
+        return self.state == self.DELETED
+
+    def to_ltrb(self):
+        center_x, center_y, width, height = self._kalman.mean[:4]
+        return np.array([center_x - width / 2, center_y - height / 2, center_x + width / 2, center_y + height / 2])
+
+    to_tlbr = to_ltrb
+
+
+class SortBackend:
+    """Легкий трекер без ембедингів: векторизована матриця IoU та угорський алгоритм.
+
+    У режимі two_stage (ByteTrack) спершу зіставляються впевнені детекції, потім решта треків —
+    із детекціями низької впевненості, які самі по собі нових треків не створюють.
+    """
+
+    def __init__(self, params=None, two_stage=False):
+        params = {**tracker_params['sort'], **(params or {})}
+        self.max_age = params['max_age']
+        self.n_init = params['n_init']
+        self.iou_threshold = params['iou_threshold']
+        self.high_threshold = params['high_threshold'] if two_stage else 0.0
+        self.tracks = []
+        self._next_id = 1
+
+    def update(self, detections, frame=None, embeds=None):
+        for track in self.tracks:
+            track.predict()
+
+        boxes = ltwh_to_ltrb(detections['ltwh'])
+        high = np.flatnonzero(detections['confidence'] >= self.high_threshold)
+        low = np.flatnonzero(detections['confidence'] < self.high_threshold)
+
+        track_indices = np.arange(len(self.tracks))
+        matches, unmatched_tracks, unmatched_high = self._associate(track_indices, high, boxes, detections)
+        matches_low, unmatched_tracks, _ = self._associate(unmatched_tracks, low, boxes, detections)
+
+        for track_index, det_index in matches + matches_low:
+            self.tracks[track_index].update(detections['ltwh'][det_index], float(detections['confidence'][det_index]),
+                                            int(detections['class_id'][det_index]))
+        for track_index in unmatched_tracks:
+            self.tracks[track_index].mark_missed()
+        for det_index in unmatched_high:
+            self.tracks.append(SortTrack(self._next_id, detections['ltwh'][det_index],
+                                         float(detections['confidence'][det_index]),
+                                         int(detections['class_id'][det_index]), self.n_init, self.max_age))
+            self._next_id += 1
+
+        self.tracks = [track for track in self.tracks if not track.is_deleted()]
+        return self.tracks
+
+    def predict(self):
+        for track in self.tracks:
+            track.predict()
+        return self.tracks
+
+    def _associate(self, track_indices, det_indices, boxes, detections):
+        """Угорське зіставлення за IoU (з урахуванням класу). Повертає (пари, вільні треки, вільні детекції)."""
+        from scipy.optimize import linear_sum_assignment
+
+        if len(track_indices) == 0 or len(det_indices) == 0:
+            return [], np.asarray(track_indices), np.asarray(det_indices)
+
+        track_boxes = np.array([self.tracks[index].to_ltrb() for index in track_indices])
+        ious = iou_matrix(track_boxes, boxes[det_indices])
+        track_classes = np.array([self.tracks[index].det_class for index in track_indices])
+        ious[track_classes[:, None] != detections['class_id'][det_indices][None, :]] = 0.0
+
+        rows, cols = linear_sum_assignment(-ious)
+        valid = ious[rows, cols] >= self.iou_threshold
+        rows, cols = rows[valid], cols[valid]
+        matches = list(zip(track_indices[rows].tolist(), det_indices[cols].tolist()))
+        unmatched_tracks = np.setdiff1d(track_indices, track_indices[rows])
+        unmatched_dets = np.setdiff1d(det_indices, det_indices[cols])
+        return matches, unmatched_tracks, unmatched_dets
+
+
+TRACKER_BACKENDS = {
+    'deepsort': lambda params: DeepSortBackend(params),
+    'sort': lambda params: SortBackend(params),
+    'bytetrack': lambda params: SortBackend(params, two_stage=True),
+}
+
+
+def create_tracker(backend=None, params=None):
+    """Створення трекера за назвою з utils.config.tracker_params['backend']."""
+    backend = backend or tracker_params['backend']
+    if backend not in TRACKER_BACKENDS:
+        raise ValueError(f"Unknown tracker backend: {backend}")
+    return TRACKER_BACKENDS[backend](params)
@@ -1,16 +1,20 @@
-import cv2
 import os
 import datetime
 
-from utils.helper import create_video_writer, save_screenshot, draw_recording_timer
+from modules.capture import AsyncCapture
+from modules.event_recorder import EventRecorder
+from modules.metrics import metrics, FpsMeter
+from modules.video_writer import AsyncVideoWriter
+from utils.helper import save_screenshot, draw_recording_timer
+from utils.config import event_recording_params
 
 
 class VideoRecorder:
     def __init__(self, video_source, output_dir):
 
-        self.video_cap = cv2.VideoCapture(video_source)
-        if not self.video_cap.isOpened():
-            raise RuntimeError(f"Error: Cannot open video source {video_source}")
+        self.video_source = video_source
+        # Захоплення у фоновому потоці з перепідключенням (utils.config.capture_params)
+        self.capture = AsyncCapture(video_source).start()
 
         self.is_recording = False
         self.writer = None
@@ -18,42 +22,86 @@ class VideoRecorder:
         self.record_end_time = None
         self.output_dir = output_dir
         self.output_file = None
+
+        # Реальний FPS оброблених кадрів (EWMA), використовується для запису
+        self.fps_meter = FpsMeter()
         self.movies_dir = os.path.join(output_dir, "movies")
         self.screenshot_dir = os.path.join(output_dir, "screenshots")
         os.makedirs(self.movies_dir, exist_ok=True)
         os.makedirs(self.screenshot_dir, exist_ok=True)
 
+        # Запис за подією (детекція цільових класів) з буфером попереднього запису
+        self.event_recorder = EventRecorder(self.movies_dir, self.recording_fps) \
+            if event_recording_params['enabled'] else None
+
+    @property
+    def is_event_recording(self):
+        return self.event_recorder is not None and self.event_recorder.is_active
+
     def toggle_recording(self):
         """Перемикання запису."""
         if self.is_recording:
             self.is_recording = False
             self.record_end_time = datetime.datetime.now()
             if self.writer:
-                self.writer.release()
+                self.writer.close()
+                self.output_file = self.writer.output_file
                 self.writer = None
         else:
-            self.is_recording = True
+            # Перший файл відкривається одразу: помилка відкриття дістається викликачеві
+            self.writer = AsyncVideoWriter(self.movies_dir, self.recording_fps()).start(self.capture.frame_size)
             self.record_start_time = datetime.datetime.now()
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            self.output_file = os.path.join(self.movies_dir, f"output_{timestamp}.mp4")
-            self.writer = create_video_writer(self.video_cap, self.output_file)
+            self.is_recording = True
+
+    def recording_fps(self):
+        """Виміряний FPS обробки; до першого виміру — FPS джерела або 30."""
+        if self.fps_meter.fps > 0:
+            return self.fps_meter.fps
+        return self.capture.fps or 30
+
+    def write_frame(self, frame, tracks=(), names=None):
+        """Облік FPS та передача анотованого кадру в потік запису (не блокує обробку)."""
+        self.fps_meter.tick()
+
+        with metrics.timer("record"):
+            writer = self.writer
+            if self.is_recording and writer is not None:
+                if not writer.write(frame):
+                    metrics.increment("recording_dropped_frames")
+                if writer.failed:
+                    print("Recording stopped: video writer failed")
+                    self.toggle_recording()
+
+            if self.event_recorder is not None and names is not None:
+                self.event_recorder.update(frame, tracks, names)
+
+    def recording_stats(self):
+        """Лічильники записаних і відкинутих кадрів поточного запису."""
+        writer = self.writer
+        return writer.stats() if writer is not None else None
 
     def save_screenshot(self, frame):
         """Збереження скріншоту."""
         save_screenshot(frame, self.screenshot_dir)
 
     def read_frame(self):
-        ret, frame = self.video_cap.read()
+        """Найсвіжіший (живе джерело) або наступний (файл) кадр. Повертає (ret, frame)."""
+        return self.capture.read()
 
-        # Додавання інформації про запис із секундоміром
+    def capture_stats(self):
+        """Статистика захоплення: час декодування, відкинуті кадри, перепідключення."""
+        return self.capture.stats()
+
+    def draw_recording_timer(self, frame):
+        """Додавання секундоміра запису на кадр."""
         if self.is_recording:
             draw_recording_timer(frame, self.record_start_time)
 
-        if not ret:
-            raise RuntimeError("Failed to read frame from video source")
-        return frame
-
     def release(self):
-        self.video_cap.release()
+        self.capture.release()
         if self.writer:
-            self.writer.release()
\ No newline at end of file
+            self.writer.close()
+            self.writer = None
+        self.is_recording = False
+        if self.event_recorder is not None:
+            self.event_recorder.close()
@@ -0,0 +1,149 @@
+import datetime
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from utils.helper import create_video_writer
+from utils.config import recording_params
+
+
+class AsyncVideoWriter:
+    """Запис відео в окремому потоці з обмеженою чергою кадрів і сегментацією файлів."""
+
+    def __init__(self, movies_dir, fps, params=None, prefix="output"):
+        self.params = {**recording_params, **(params or {})}
+        if self.params['drop_policy'] not in ("drop_oldest", "drop_newest", "block"):
+            raise ValueError(f"Unknown recording drop policy: {self.params['drop_policy']}")
+
+        self.movies_dir = movies_dir
+        self.fps = fps
+        self.prefix = prefix
+        self.segment_seconds = self.params['segment_minutes'] * 60
+        self.queue = queue.Queue(maxsize=self.params['queue_size'])
+
+        self.output_files = []
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self._writer = None
+        self._segment_start = None
+        self._thread = threading.Thread(target=self._writer_loop, name="video-writer", daemon=True)
+        self._closed = False
+        self.failed = False  # Потік запису завершився з помилкою, нові кадри не приймаються
+
+    @property
+    def output_file(self):
+        return self.output_files[-1] if self.output_files else None
+
+    def start(self, frame_size=None):
+        """Запуск потоку запису. З frame_size (ширина, висота) перший файл відкривається одразу,
+        тож помилка відкриття (наприклад, недоступний fourcc) дістається викликачеві."""
+        if frame_size is not None:
+            self._open_segment(tuple(frame_size), time.time())
+        self._thread.start()
+        return self
+
+    def write(self, frame, timestamp=None):
+        """Передача кадру у потік запису. Повертає False, якщо кадр відкинуто."""
+        return self._put([(time.time() if timestamp is None else timestamp, frame)])
+
+    def write_many(self, frames):
+        """Передача послідовності (час, кадр або JPEG-байти) одним елементом черги."""
+        return self._put(list(frames)) if frames else True
+
+    def _put(self, item):
+        if self._closed or self.failed:
+            return False
+        policy = self.params['drop_policy']
+        if policy == "block":
+            # Очікування з тайм-аутом, щоб не зависнути, якщо потік запису завершився
+            while not self._closed and not self.failed:
+                try:
+                    self.queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            self.frames_dropped += len(item)
+            return False
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            if policy == "drop_newest":
+                self.frames_dropped += len(item)
+                return False
+        # drop_oldest: витіснення найстарішого елемента черги
+        try:
+            self.frames_dropped += len(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.frames_dropped += len(item)
+            return False
+
+    def close(self, timeout=10.0, wait=True):
+        """Дописування черги та закриття файлу."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread.is_alive():
+            # Сигнал зупинки ніколи не блокує: при повній черзі потік сам завершиться, коли її допише
+            try:
+                self.queue.put_nowait(None)
+            except queue.Full:
+                pass
+            if wait:
+                self._thread.join(timeout)
+
+    def stats(self):
+        return {'frames_written': self.frames_written,
+                'frames_dropped': self.frames_dropped,
+                'queue_depth': self.queue.qsize(),
+                'fps': self.fps,
+                'segments': len(self.output_files)}
+
+    def _writer_loop(self):
+        try:
+            while True:
+                try:
+                    item = self.queue.get(timeout=0.1)
+                except queue.Empty:
+                    if self._closed:
+                        break
+                    continue
+                if item is None:
+                    break
+                for timestamp, frame in item:
+                    if not isinstance(frame, np.ndarray):
+                        # Стиснений кадр (наприклад, із буфера попереднього запису)
+                        frame = cv2.imdecode(np.frombuffer(frame, dtype=np.uint8), cv2.IMREAD_COLOR)
+                    if self._writer is None or \
+                            (self.segment_seconds and timestamp - self._segment_start >= self.segment_seconds):
+                        self._open_segment(frame.shape[1::-1], timestamp)
+                    self._writer.write(frame)
+                    self.frames_written += 1
+        except Exception as e:
+            self.failed = True
+            print(f"Video writer error: {e}")
+        finally:
+            if self._writer is not None:
+                self._writer.release()
+                self._writer = None
+
+    def _open_segment(self, frame_size, timestamp):
+        """Перехід до нового файлу (сегмента)."""
+        if self._writer is not None:
+            self._writer.release()
+        # Мілісекунди в назві: повторний запуск у ту саму секунду не перезаписує попередній файл
+        name = datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d_%H-%M-%S_%f")[:-3]
+        output_file = os.path.join(self.movies_dir, f"{self.prefix}_{name}.mp4")
+        self._writer = create_video_writer(output_file, frame_size, self.fps, self.params['fourcc'])
+        self._segment_start = timestamp
+        self.output_files.append(output_file)
+        print(f"Recording to {output_file} at {self.fps:.2f} FPS")
@@ -1,3 +1,5 @@
+import os
+
 deep_sort_params = {
     # Відстеження
 
@@ -11,16 +13,181 @@ deep_sort_params = {
 
     # Фільтрація
     'nms_max_overlap': 0.7,  # Підтримка об'єктів у густих сценах
-    'half': True,
+}
+
+# Ембединги ре-ID для DeepSort (modules/embedding.py)
+embedding_params = {
+    'half': True,  # FP16, застосовується лише на GPU
+    'batch_size': 64,  # Максимальна кількість кропів в одному проході ембедера
+    'cache_size': 256,  # LRU-кеш ембедингів за track_id
+    'iou_threshold': 0.7,  # Мінімальний IoU з кешованою рамкою для повторного використання ембедингу
+    'refresh_interval': 10,  # Повний перерахунок кожен K-й кадр; 1 — завжди, 0 — лише для нових/зрушених об'єктів
+}
+
+# Вибір трекера
+tracker_params = {
+    'backend': 'deepsort',  # 'deepsort', 'sort' (IoU + Калман) або 'bytetrack' (двоетапне зіставлення)
+    'sort': {
+        'max_age': deep_sort_params['max_age'],
+        'n_init': deep_sort_params['n_init'],
+        'iou_threshold': 0.3,  # Мінімальний IoU для зіставлення
+        'high_threshold': 0.6,  # bytetrack: поріг впевнених детекцій (нижчі надходять, якщо conf моделі нижчий)
+    },
+}
+
+# Траєкторії треків
+trajectory_params = {
+    'capacity': 64,  # Максимальна кількість точок траєкторії на трек
 }
 
 classes = ['person', 'bicycle', 'car', 'motorbike', 'aeroplane', 'bus', 'train', 'truck', 'boat', 'traffic light',
            'fire hydrant', 'stop sign', 'parking meter', 'bench', 'bird', 'cat', 'dog']
 
-# Параметри для ObjectDetection ndTracking
-detection_params = ["/Users/erihkoh/GitHub/video_detecting_and_tracking/yolov8m.pt", 0.8]
+# Параметри для ObjectDetection ndTracking (ваги шукаються за шляхом, потім у model_params['cache_dir'])
+detection_params = ["yolov8m.pt", 0.8]
+
+# Завантаження моделі
+model_params = {
+    'cache_dir': os.environ.get('VDT_MODEL_CACHE', '~/.cache/video_detecting_and_tracking'),
+    'formats': ['openvino', 'onnx', 'torchscript', 'pytorch'],  # Порядок пріоритету форматів на CPU
+    'export_missing': False,  # Експортувати відсутні формати з .pt при першому запуску
+    'device': None,  # None — автоматично (cuda, mps, cpu)
+    'num_threads': None,  # Кількість потоків torch, None — за замовчуванням
+    'warmup_runs': 2,  # Кількість прогрівальних проходів
+}
 video_source = 1
 
+# Захоплення відео у фоновому потоці (modules/capture.py)
+capture_params = {
+    'backend': 'any',  # 'any', 'ffmpeg', 'gstreamer', 'v4l2', 'dshow', 'msmf'
+    'hw_acceleration': True,  # Апаратне декодування, якщо його підтримує збірка OpenCV
+    'frame_size': None,  # (ширина, висота) — запит меншої роздільності в камери, None — як є
+    'frame_step': 1,  # Обробляти кожен N-й кадр; пропущені кадри лише grab() без retrieve()
+    'queue_size': 4,  # Черга кадрів для файлів; живі джерела тримають лише найсвіжіший кадр
+    'open_timeout_ms': 5000,  # Тайм-аут відкриття та читання мережевих потоків
+    'reconnect_delay': 0.5,  # Початкова затримка перепідключення, с (подвоюється після кожної невдачі)
+    'max_reconnect_delay': 10.0,
+    'max_reconnects': None,  # Максимальна кількість спроб поспіль; None — без обмеження
+}
+
+# Попередня обробка зображення перед детекцією
+preprocessing_params = {
+    'filters': ['blur', 'normalize'],  # Будь-яка послідовність 'blur', 'normalize', 'clahe'; [] — без обробки
+    'blur_kernel': (5, 5),
+    'clahe_clip_limit': 2.0,
+    'clahe_tile_grid': (8, 8),
+    'at_model_resolution': False,  # True — фільтрувати лише вхід моделі 640x640, а не повний кадр
+}
+
+# Адаптивна частота детекції (вимкнено — детекція на кожному кадрі)
+cadence_params = {
+    'enabled': False,
+    'min_interval': 1,  # Мінімальний крок між кадрами з детекцією
+    'max_interval': 5,  # Максимальний крок (не більше за max_age трекера)
+    'target_fps': 15.0,  # Цільовий вихідний FPS
+}
+
+# Журнал подій
+logger_params = {
+    'format': 'jsonl',  # 'jsonl' або 'csv'
+    'mode': 'events',  # 'events' — появи/оновлення/втрати треків, 'frames' — кожен трек у кожному кадрі
+    'update_interval': 5.0,  # Період подій 'updated' для активного треку, с
+    'flush_interval': 1.0,  # Період пакетного запису на диск, с
+    'max_queue': 10000,  # Максимальна кількість записів у черзі (надлишок відкидається)
+    'max_bytes': 10 * 1024 * 1024,  # Ротація за розміром файлу
+    'rotate_interval': 24 * 3600,  # Ротація за часом, с
+    'backup_count': 5,  # Кількість архівних файлів
+}
+
+# Детекція лише за наявності руху (для нерухомих камер)
+motion_params = {
+    'enabled': False,  # Без руху й без підтверджених треків YOLO не запускається
+    'method': 'mog2',  # 'mog2' — віднімання фону, 'diff' — різниця з попереднім проаналізованим кадром
+    'width': 320,  # Ширина зменшеного кадру для аналізу руху
+    'diff_threshold': 25,  # diff: мінімальна зміна яскравості пікселя
+    'min_area': 0.001,  # Мінімальна площа області руху (частка кадру)
+    'detection_area': 'full',  # 'full' — весь кадр, 'roi' — лише полігони ROI, 'motion' — лише області руху й треки
+    'padding': 32,  # Поле навколо областей детекції, пікселів
+    'min_region_size': 96,  # Мінімальна сторона області детекції, пікселів
+    'max_coverage': 0.6,  # Області займають більшу частку кадру — детекція на всьому кадрі
+    'roi': [],  # Полігони ROI у відносних координатах: [[(0.1, 0.2), (0.9, 0.2), (0.9, 1.0), (0.1, 1.0)]]
+}
+
+# Тайлова детекція для кадрів високої роздільності (дрібні об'єкти)
+tiling_params = {
+    'enabled': False,
+    'tile_size': 640,  # Сторона тайла в пікселях оригінального кадру
+    'overlap': 0.2,  # Перекриття сусідніх тайлів (частка)
+    'hybrid': True,  # Додатковий грубий прохід по всьому кадру для великих об'єктів
+    'nms_iou': 0.5,  # Поріг IoU для NMS під час об'єднання результатів тайлів
+    'max_batch': 16,  # Максимальна кількість тайлів в одному проході моделі
+}
+
+# Запис відео
+recording_params = {
+    'queue_size': 64,  # Черга кадрів потоку запису
+    'drop_policy': 'drop_oldest',  # 'drop_oldest', 'drop_newest' або 'block' при переповненні черги
+    'segment_minutes': 10,  # Тривалість одного файлу, хв; 0 — без сегментації
+    'fourcc': 'avc1',  # H.264
+}
+
+# Запис за подією
+event_recording_params = {
+    'enabled': False,
+    'trigger_classes': ['person'],  # Класи, підтверджений трек яких запускає запис
+    'pre_seconds': 5.0,  # Тривалість буфера попереднього запису, с
+    'post_seconds': 10.0,  # Запис після останнього підтвердженого треку, с
+    'max_buffer_mb': 64,  # Жорсткий ліміт пам'яті буфера
+    'jpeg_quality': 80,  # Якість стиснення кадрів у буфері
+}
+
+# Метрики продуктивності
+metrics_params = {
+    'window': 512,  # Розмір ковзного вікна для перцентилів затримок
+    'fps_smoothing': 0.9,  # Коефіцієнт згладжування EWMA для FPS
+    'http_port': None,  # Порт локального ендпоінту /metrics (Prometheus) і /metrics.json, None — вимкнено
+    'json_dump_path': None,  # Файл для періодичного JSON-знімка, None — вимкнено
+    'json_dump_interval': 10.0,  # Період JSON-знімка, с
+}
+
+# Параметри конвеєра обробки
+pipeline_params = {
+    'queue_size': 2,  # Розмір черг між етапами
+    'drop_policy': None,  # 'latest' — лише найсвіжіший кадр, 'lossless' — без втрат, None — за типом джерела
+}
+
+# Параметри багатопотокового режиму (одна модель на всі джерела)
+multi_stream_params = {
+    'sources': [video_source],  # Список камер, RTSP-потоків або файлів
+    'max_batch_size': 8,  # Максимальний розмір пакета для одного проходу моделі
+    'max_wait_ms': 20,  # Максимальне очікування на заповнення пакета
+    'queue_size': 2,  # Розмір черги кадрів для кожного джерела
+    'stats_interval': 5.0,  # Період виведення статистики, с
+}
+
+# Відображення в GUI
+display_params = {
+    'max_fps': None,  # Обмеження частоти показу; None — частота оновлення монітора
+}
+
+# Локальний сервер трансляції результатів (MJPEG + події треків через SSE/WebSocket)
+stream_server_params = {
+    'enabled': False,
+    'host': '127.0.0.1',  # '0.0.0.0' — доступ з інших машин
+    'port': 8090,
+    'jpeg_quality': 75,
+    'max_fps': 15,  # Максимальна частота кодування кадрів для MJPEG
+    'client_queue': 2,  # Повідомлень у черзі клієнта; повільні клієнти втрачають найстаріші
+}
+
+# Багатопроцесорний режим (modules/multiprocess.py)
+multiprocess_params = {
+    'detect_workers': 2,  # Процеси детекції (кожен завантажує власну модель)
+    'slots': 8,  # Слоти кадрів у спільній пам'яті (максимум кадрів в обробці одночасно)
+    'detect_every': 1,  # Детекція кожен N-й кадр, між ними — прогноз трекера
+    'torch_threads': 1,  # Потоки torch на процес детекції
+}
+
 # color
 colors = {'RED': (0, 0, 255),
           'GREEN': (0, 255, 0),
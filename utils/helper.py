@@ -1,20 +1,27 @@
 import datetime
 import cv2
+import numpy as np
 import os
 
+# Компактний формат детекцій: [x, y, ширина, висота], впевненість, ідентифікатор класу
+DETECTION_DTYPE = np.dtype([('ltwh', np.int32, (4,)), ('confidence', np.float32), ('class_id', np.int32)])
 
-def create_video_writer(video_cap, output_filename):
-    frame_width = int(video_cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    frame_height = int(video_cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    fps = int(video_cap.get(cv2.CAP_PROP_FPS) or 30)  # Використання стандартного FPS, якщо значення невідоме
 
-    fourcc = cv2.VideoWriter_fourcc(*'avc1')  # H.264
-    writer = cv2.VideoWriter(output_filename, fourcc, fps, (frame_width, frame_height))
+def create_video_writer(output_filename, frame_size, fps, fourcc='avc1'):
+    """Відкриття VideoWriter для кадрів розміру frame_size (ширина, висота) із заданим FPS."""
+    writer = cv2.VideoWriter(output_filename, cv2.VideoWriter_fourcc(*fourcc), fps, frame_size)
     if not writer.isOpened():
         raise IOError(f"Failed to open VideoWriter for {output_filename}")
     return writer
 
 
+def is_live_source(video_source):
+    """Визначає, чи є джерело живим потоком (камера або мережевий потік), а не файлом."""
+    if isinstance(video_source, int) or str(video_source).isdigit():
+        return True
+    return str(video_source).lower().startswith(("rtsp://", "rtmp://", "http://", "https://", "udp://", "tcp://"))
+
+
 def save_screenshot(frame, screenshot_dir):
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     screenshot_path = os.path.join(screenshot_dir, f"screenshot_{timestamp}.png")
@@ -22,39 +29,144 @@ def save_screenshot(frame, screenshot_dir):
     print(f"Screenshot saved to {screenshot_path}")
 
 
-def calculate_fps(prev_time):
-    elapsed_time = 0
-    num_frames = 100  # Test on 100 frames for stability
-
-    for _ in range(num_frames):
-        elapsed_time += (datetime.datetime.now() - prev_time).total_seconds()
-
-    avg_time_per_frame = elapsed_time / num_frames
-    return 1 / avg_time_per_frame
-
-
 def draw_text(frame, text, position, color):
     cv2.putText(frame, text, position, cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
 
 
-def log_detections(path, detected_objects):
-    """Логування інформації про детекцію об’єктів лише при їх наявності."""
-    if not detected_objects:
-        return
-
-    current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(path, "a") as f:
-        f.write(f"--- Лог від {current_time} ---\n")
-        for obj in detected_objects:
-            f.write(f"{current_time} - {obj}\n")
-        f.write("\n")  # Розділення записів
-
-
-def filter_image(frame):
-    """Обробка зображення: фільтрація шуму та корекція освітлення."""
-    frame = cv2.GaussianBlur(frame, (5, 5), 0)  # Зменшення шуму
-    frame = cv2.normalize(frame, None, alpha=0, beta=255, norm_type=cv2.NORM_MINMAX)  # Корекція освітлення
-    return frame
+def letterbox(frame, dst, fill=114):
+    """Вписує кадр у буфер dst зі збереженням пропорцій. Повертає (масштаб, зсув x, зсув y)."""
+    height, width = frame.shape[:2]
+    dst_height, dst_width = dst.shape[:2]
+    scale = min(dst_width / width, dst_height / height)
+    new_width, new_height = int(round(width * scale)), int(round(height * scale))
+    left, top = (dst_width - new_width) // 2, (dst_height - new_height) // 2
+
+    # Заповнення лише полів, область зображення перезаписується resize
+    dst[:top] = fill
+    dst[top + new_height:] = fill
+    dst[top:top + new_height, :left] = fill
+    dst[top:top + new_height, left + new_width:] = fill
+    cv2.resize(frame, (new_width, new_height), dst=dst[top:top + new_height, left:left + new_width],
+               interpolation=cv2.INTER_LINEAR)
+    return scale, left, top
+
+
+def unletterbox_boxes(boxes, scale, left, top, frame_shape):
+    """Переводить рамки (N, >=4) [x1, y1, x2, y2, ...] з координат letterbox у координати кадру."""
+    boxes = np.array(boxes, dtype=np.float32)
+    height, width = frame_shape[:2]
+    boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - left) / scale).clip(0, width)
+    boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - top) / scale).clip(0, height)
+    return boxes
+
+
+def build_class_mask(names, allowed_classes):
+    """Булева маска дозволених класів, індексована class_id моделі."""
+    mask = np.zeros(max(names) + 1, dtype=bool)
+    for class_id, name in names.items():
+        mask[class_id] = name in allowed_classes
+    return mask
+
+
+def boxes_to_detections(boxes, confidence_threshold, class_mask):
+    """Перетворення масиву YOLO (N, 6) [x1, y1, x2, y2, conf, cls] у масив DETECTION_DTYPE."""
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 6)
+    class_ids = boxes[:, 5].astype(np.int32)
+    corners = boxes[:, :4].astype(np.int32)
+    # Рамки нульової ширини чи висоти (обрізані краєм кадру) DeepSort відкидає вже після обчислення
+    # ембедингів, що зсуває відповідність рамок і ембедингів, тому вони відкидаються тут
+    keep = (boxes[:, 4] >= confidence_threshold) & (class_ids >= 0) & (class_ids < len(class_mask)) & \
+        (corners[:, 2] > corners[:, 0]) & (corners[:, 3] > corners[:, 1])
+    keep[keep] = class_mask[class_ids[keep]]
+
+    boxes = boxes[keep]
+    corners = corners[keep]
+    detections = np.empty(len(boxes), dtype=DETECTION_DTYPE)
+    detections['ltwh'][:, :2] = corners[:, :2]
+    detections['ltwh'][:, 2:] = corners[:, 2:] - corners[:, :2]
+    detections['confidence'] = boxes[:, 4]
+    detections['class_id'] = class_ids[keep]
+    return detections
+
+
+def ltwh_to_ltrb(ltwh):
+    """Рамки (N, 4) [x, y, ширина, висота] -> [x1, y1, x2, y2]."""
+    boxes = np.asarray(ltwh, dtype=np.float32).reshape(-1, 4).copy()
+    boxes[:, 2:] += boxes[:, :2]
+    return boxes
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Матриця IoU (N, M) між рамками [x1, y1, x2, y2]."""
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    area_a = (boxes_a[:, 2:] - boxes_a[:, :2]).clip(0).prod(axis=1)
+    area_b = (boxes_b[:, 2:] - boxes_b[:, :2]).clip(0).prod(axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def merge_boxes(boxes):
+    """Об'єднання рамок [x1, y1, x2, y2], що перетинаються, в охоплюючі прямокутники."""
+    merged = [list(box) for box in boxes]
+    changed = True
+    while changed:
+        changed = False
+        result = []
+        for box in merged:
+            for other in result:
+                if box[0] <= other[2] and other[0] <= box[2] and box[1] <= other[3] and other[1] <= box[3]:
+                    other[:] = [min(box[0], other[0]), min(box[1], other[1]),
+                                max(box[2], other[2]), max(box[3], other[3])]
+                    changed = True
+                    break
+            else:
+                result.append(box)
+        merged = result
+    return [tuple(box) for box in merged]
+
+
+def boxes_intersect(box, boxes):
+    """Чи перетинається рамка [x1, y1, x2, y2] хоча б з однією з boxes."""
+    return any(box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]
+               for other in boxes)
+
+
+def tile_grid(frame_shape, tile_size, overlap):
+    """Сітка тайлів [x1, y1, x2, y2] розміру tile_size з перекриттям overlap (частка), що покриває кадр."""
+    height, width = frame_shape[:2]
+    step = max(1, int(tile_size * (1 - overlap)))
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        return list(range(0, length - tile_size, step)) + [length - tile_size]
+
+    return [(x, y, min(x + tile_size, width), min(y + tile_size, height))
+            for y in starts(height) for x in starts(width)]
+
+
+def nms_detections(detections, iou_threshold):
+    """NMS з урахуванням класу для масиву DETECTION_DTYPE: рамки різних класів не пригнічують одна одну."""
+    if len(detections) < 2:
+        return detections
+    order = np.argsort(-detections['confidence'], kind="stable")
+    boxes = ltwh_to_ltrb(detections['ltwh'][order])
+    # Зсув рамок кожного класу в окрему область, щоб рамки різних класів не перетиналися
+    boxes += ((boxes.max() + 1) * detections['class_id'][order].astype(np.float32))[:, None]
+    ious = iou_matrix(boxes, boxes)
+
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for index in range(len(order)):
+        if suppressed[index]:
+            continue
+        keep.append(order[index])
+        suppressed |= ious[index] > iou_threshold
+    return detections[np.sort(keep)]
 
 
 def draw_datetime(frame):